@@ -0,0 +1,8 @@
+from px2ph.pens.strokePen import StrokeToShapeSegmentPen
+from px2ph.pens.arrayStrokePen import ArrayStrokeToShapeSegmentPen
+
+
+stroke_engines = {
+    'pen': StrokeToShapeSegmentPen,
+    'array': ArrayStrokeToShapeSegmentPen,
+}
@@ -0,0 +1,132 @@
+from numpy import arange, arccos, array, errstate, hypot, tan, where
+
+from px2ph.pens.strokePen import StrokeToShapeSegmentPen, segment_codes
+from px2ph.utils.math import right_angles
+
+
+# exact constants as used by px2ph.utils.math.rotate
+cos90, sin90 = right_angles[90]
+cos_90, sin_90 = right_angles[270]
+offcurve, line, curve = (segment_codes[segmentType]
+                         for segmentType in (None, 'line', 'curve'))
+
+
+def rotate(v, cos, sin):
+    """ Rotates an array of vectors, see px2ph.utils.math.rotate """
+    return array([cos * v[0] - sin * v[1], sin * v[0] + cos * v[1]])
+
+
+def parallels(p0, p1, offset):
+    """
+    Returns the offset vectors of the two parallels of every segment p0 -> p1,
+    see px2ph.utils.math.double_parallel.
+    """
+    v = p1 - p0
+    v = v / hypot(v[0], v[1]) * offset
+    return rotate(v, cos90, sin90), rotate(v, cos_90, sin_90)
+
+
+def intersect(a, b, c, d, force=False):
+    """
+    Returns the intersections of every pair of lines (a, b) and (c, d) and a
+    mask of the valid ones, see px2ph.utils.math.intersect.
+    """
+    i, j = b - a, d - c
+    div = i[0] * j[1] - i[1] * j[0]
+    with errstate(divide='ignore', invalid='ignore'):
+        m = (i[0] * a[1] - i[0] * c[1] - i[1] * a[0] + i[1] * c[0]) / div
+        valid = div != 0
+        if not force:
+            valid &= (0 < m) & (m < 1)
+        return c + j * m, valid
+
+
+def arc_control_vectors(start, end, center, offset):
+    """
+    Returns the vectors used to place the control points of the arcs joining
+    start to end around center, see StrokeToShapeSegmentPen._linejoin_round.
+    """
+    a, b, c = center - start, center - end, end - start
+    theta = (a[0]**2 + a[1]**2) + (b[0]**2 + b[1]**2) - (c[0]**2 + c[1]**2)
+    with errstate(invalid='ignore'):
+        theta = arccos((1/2 * theta) / (offset**2))
+    alpha = (4/3) * tan(theta/4)
+    return a * alpha, b * alpha
+
+
+class ArrayStrokeToShapeSegmentPen(StrokeToShapeSegmentPen):
+    '''
+    StrokeToShapeSegmentPen computing the linejoins of a whole contour at
+    once with numpy arrays. Linecaps and one point contours are still drawn
+    by the inherited methods.
+    '''
+
+    def _draw_parallels(self, points, open):
+        pointslen = len(points)
+        if open:
+            self._linecap(points[0], points[1])
+            if pointslen > 2:
+                self._draw_linejoins(points, arange(1, pointslen - 1))
+            self._linecap(points[-1], points[-2])
+        else:
+            self._draw_linejoins(points, arange(pointslen))
+
+    def _draw_linejoins(self, points, indices):
+        coords = array([point[0] for point in points], dtype=float).T
+        p0 = coords[:, indices - 1]
+        p1 = coords[:, indices]
+        p2 = coords[:, (indices + 1) % len(points)]
+
+        n0a, n0b = parallels(p0, p1, self.offset)
+        n1a, n1b = parallels(p1, p2, self.offset)
+        # end of the first segment parallels, start of the second ones
+        s0a, s0b, s1a, s1b = p1 + n0a, p1 + n0b, p1 + n1a, p1 + n1b
+        force = self.linejoin == 'miter'
+        i0, valid0 = intersect(p0 + n0a, s0a, s1a, p2 + n1a, force)
+        i1, valid1 = intersect(p0 + n0b, s0b, s1b, p2 + n1b, force)
+
+        if self.linejoin == 'miter':
+            outer = where(valid0, i0, s0a).T.ravel().tolist()
+            inner = where(valid1, i1, s0b).T.ravel().tolist()
+            self.outer.extend_coords(outer, [line] * (len(outer) // 2))
+            self.inner.extend_coords(inner, [line] * (len(inner) // 2))
+            return
+
+        self.outer.extend_coords(
+            *self._linejoin_points(i0, valid0, s0a, s1a, p1, 1))
+        self.inner.extend_coords(
+            *self._linejoin_points(i1, valid1, s0b, s1b, p1, -1))
+
+    def _linejoin_points(self, intersection, valid, start, end, center,
+                         trend):
+        """
+        Returns the coordinates and codes of the points of every linejoin of
+        one side (trend is 1 for the outer side, -1 for the inner side).
+        """
+        intersection = intersection.T.tolist()
+        valid = valid.tolist()
+        start_list, end_list = start.T.tolist(), end.T.tolist()
+
+        if self.linejoin == 'round':
+            a, b = arc_control_vectors(start, end, center, self.offset)
+            if trend == 1:
+                cp1 = start + rotate(a, cos90, sin90)
+                cp2 = end + rotate(b, cos_90, sin_90)
+            else:
+                cp1 = start + rotate(a, cos_90, sin_90)
+                cp2 = end + rotate(b, cos90, sin90)
+            cp1, cp2 = cp1.T.tolist(), cp2.T.tolist()
+
+        start_type, end_type = (line, curve) if trend == 1 else (curve, line)
+        coords, types = [], []
+        for k, is_valid in enumerate(valid):
+            if is_valid:
+                coords += intersection[k]
+                types.append(line)
+            elif self.linejoin == 'bevel':
+                coords += start_list[k] + end_list[k]
+                types += (line, line)
+            else:
+                coords += start_list[k] + cp1[k] + cp2[k] + end_list[k]
+                types += (start_type, offcurve, offcurve, end_type)
+        return coords, types
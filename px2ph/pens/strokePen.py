@@ -1,8 +1,115 @@
 import math
+from array import array
+from functools import lru_cache
+from itertools import chain
+from types import SimpleNamespace
 
 from fontTools.pens.pointPen import PointToSegmentPen, SegmentToPointPen
 
 import px2ph.utils.math as math_
+from px2ph.utils import instrument
+
+
+# codes of the segment types of outline points in a PointBuffer
+segment_codes = {None: 0, 'line': 1, 'curve': 2}
+
+
+class PointBuffer:
+    """
+    Outline points of a stroked contour, as coordinates in a float array and
+    segment type codes (see `segment_codes`) in a byte array. The arrays are
+    preallocated and kept when the buffer is cleared, to be filled again by
+    the next contours.
+    """
+    def __init__(self, capacity=64):
+        self.coords = array('d', bytes(16 * capacity))
+        self.types = array('b', bytes(capacity))
+        self.length = 0
+
+    def __len__(self):
+        return self.length
+
+    def _grow(self):
+        self.coords.extend(self.coords)
+        self.types.extend(self.types)
+
+    def append(self, pt, segmentType):
+        i = self.length
+        if i == len(self.types):
+            self._grow()
+        self.coords[2*i] = pt[0]
+        self.coords[2*i + 1] = pt[1]
+        self.types[i] = segment_codes[segmentType]
+        self.length = i + 1
+
+    def extend(self, points, x=0, y=0):
+        """
+        Appends `(px, py, code)` points moved by `(x, y)`.
+        """
+        coords, types = self.coords, self.types
+        i = self.length
+        for px, py, code in points:
+            if i == len(types):
+                self._grow()
+            coords[2*i] = px + x
+            coords[2*i + 1] = py + y
+            types[i] = code
+            i += 1
+        self.length = i
+
+    def extend_coords(self, coords, types):
+        """
+        Appends points given as a sequence of x, y coordinates and a sequence
+        of their codes.
+        """
+        i, n = self.length, len(types)
+        while i + n > len(self.types):
+            self._grow()
+        self.coords[2*i:2*(i + n)] = array('d', coords)
+        self.types[i:i + n] = array('b', types)
+        self.length = i + n
+
+    def clear(self):
+        self.length = 0
+
+    def items(self):
+        """
+        Returns the points as `(px, py, code)` tuples.
+        """
+        n = self.length
+        return tuple(zip(self.coords[0:2*n:2], self.coords[1:2*n:2],
+                         self.types[:n]))
+
+    def points(self):
+        """
+        Returns the list of points coordinates and the array of their codes.
+        """
+        n = self.length
+        return (list(zip(self.coords[0:2*n:2], self.coords[1:2*n:2])),
+                self.types[:n])
+
+
+@lru_cache(maxsize=4096)
+def cached_outline(method, offset, *vectors):
+    """
+    Returns the outer and inner points, as `(px, py, code)` tuples, drawn by
+    a linejoin/linecap/one point method of StrokeToShapeSegmentPen for points
+    given relatively to the point the method is processing.
+    """
+    pen = SimpleNamespace(offset=offset, outer=PointBuffer(),
+                          inner=PointBuffer())
+    method(pen, *((vector,) for vector in vectors))
+    return pen.outer.items(), pen.inner.items()
+
+
+@lru_cache(maxsize=16)
+def shared_pen(pen_class, stroke_width, options):
+    """
+    Returns a pen of the given class and `(name, value)` options, created
+    once and reused for every glyph: `reset` it with the glyph output pen
+    before drawing. A shared pen can't draw two glyphs at once.
+    """
+    return pen_class(None, stroke_width, **dict(options))
 
 
 class StrokeToShapeSegmentPen(PointToSegmentPen):
@@ -13,14 +120,9 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
     '''
 
     def __init__(self, out_pen, stroke_width, segment_pen=None,
-                 linecap='square', linejoin='miter',
-                 outputImpliedClosingLine=False):
-        if segment_pen is None:
-            segment_pen = SegmentToPointPen(out_pen)
-        else:
-            segment_pen = segment_pen(out_pen)
-
-        super().__init__(segment_pen, outputImpliedClosingLine)
+                 linecap='square', linejoin='miter', memoize=True,
+                 simplify=False, outputImpliedClosingLine=False):
+        super().__init__(None, outputImpliedClosingLine)
 
         try:
             self._linecap = getattr(self, '_linecap_' + linecap)
@@ -32,7 +134,53 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
         except AttributeError:
             raise NameError('No method for linejoin: ' + linejoin)
 
+        # since points lie on a grid, the same joins and caps come up again
+        # and again and can be computed once then moved into place
+        if memoize:
+            self._linecap = self._memoize(self._linecap, 0)
+            self._one_point = self._memoize(self._one_point, 0)
+            self._linejoin = self._memoize(self._linejoin, 1)
+
         self.offset = stroke_width/2
+        self.simplify = simplify
+        self.linecap, self.linejoin = linecap, linejoin
+        self.outer, self.inner = PointBuffer(), PointBuffer()
+        self.reset(out_pen, segment_pen)
+
+    def reset(self, out_pen, segment_pen=None):
+        """
+        Makes the pen draw into a new output pen, to stroke another glyph with
+        the same options and buffers.
+        """
+        if segment_pen is None:
+            self.pen = SegmentToPointPen(out_pen)
+        else:
+            self.pen = segment_pen(out_pen)
+        self.currentPath = None
+
+    def _memoize(self, method, center):
+        """
+        Wraps a linejoin/linecap method so that its output is looked up with
+        `cached_outline` from the points positions relative to the point at
+        index `center`, then translated to this point.
+        """
+        function = method.__func__
+
+        def memoized(*points):
+            x, y = points[center][0]
+            outer, inner = cached_outline(
+                function, self.offset,
+                *((pt[0][0] - x, pt[0][1] - y) for pt in points))
+            self.outer.extend(outer, x, y)
+            if inner:
+                self.inner.extend(inner, x, y)
+
+        return memoized
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None, **kwargs):
+        # only the position and segment type of stroked points are used
+        self.currentPath.append((pt, segmentType))
 
     def endPath(self):
         """
@@ -43,26 +191,116 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
         self.currentPath = None
         assert points is not None
         assert len(points) >= 1
+        if self.simplify:
+            points = self._remove_straight_points(points)
         self._stroke_to_contour(points)
 
+    def _remove_straight_points(self, points):
+        """
+        Returns the contour without the points where it goes straight on, so
+        that only real direction changes are stroked.
+        The first and last points of an open contour are always kept.
+        """
+        pointslen = len(points)
+        if pointslen < 3:
+            return points
+        open = points[0][1] == 'move'
+        kept = [
+            point for i, point in enumerate(points)
+            if open and (i == 0 or i == pointslen-1)
+            or not math_.is_straight(points[i-1][0], point[0],
+                                     points[(i+1) % pointslen][0])
+        ]
+        # a closed contour can't be a single point
+        return kept if len(kept) > 1 else points
+
     def _stroke_to_contour(self, points):
         """
         Sort of _flushContour method that will be triggered before the
         inherited _flushContour.
         It transforms a simple stroke contour into a shape contour by drawing
-        its parallels and then calls the real endPath() method with 'super()'
-        to trigger the basic behavior of a "PointToSegmentPen' pen.
+        its parallels into the outer and inner buffers, then draws them into
+        the segment pen (see `_draw_outline`).
         """
         pointslen = len(points)
         open = points[0][1] == 'move'
+        outer, inner = self.outer, self.inner
+        outer.clear()
+        inner.clear()
 
-        self.beginPath()
         if pointslen == 1:
             self._one_point(points[0])
-            super().endPath()
+            if instrument.enabled:
+                self._count_outline(points, open, outer.types[:len(outer)])
+            self._draw_outline(*outer.points())
             return
 
-        self.innerPath = []
+        self._draw_parallels(points, open)
+        outer_points, outer_types = outer.points()
+        inner_points, inner_types = inner.points()
+        if instrument.enabled:
+            self._count_outline(points, open, outer_types + inner_types)
+
+        inner_points.reverse()
+        inner_types.reverse()
+        # merge paths if contour is an open contour
+        if open:
+            self._draw_outline(outer_points + inner_points,
+                               outer_types + inner_types)
+        # else draw two contours
+        else:
+            self._draw_outline(outer_points, outer_types)
+            self._draw_outline(inner_points, inner_types)
+
+    def _draw_outline(self, points, types):
+        """
+        Draws a closed contour of points and segment type codes into the
+        segment pen, as the inherited endPath would: from the first on-curve
+        point and without the implied closing line.
+        """
+        pointslen = len(points)
+        if pointslen == 0:
+            return
+        start = next(i for i, code in enumerate(types) if code)
+        pen = self.pen
+        last = points[start]
+        pen.moveTo(last)
+        offcurves = []
+        for i in chain(range(start + 1, pointslen), range(start + 1)):
+            code, pt = types[i], points[i]
+            if code == 0:
+                offcurves.append(pt)
+            elif code == 1:
+                if i != start or self.outputImpliedClosingLine or pt == last:
+                    pen.lineTo(pt)
+                    last = pt
+            else:
+                pen.curveTo(*offcurves, pt)
+                offcurves = []
+                last = pt
+        pen.closePath()
+
+    def _count_outline(self, points, open, types):
+        """
+        Counts the linejoins, linecaps (or one point caps) by type and the
+        curves of a stroked contour (see `px2ph.utils.instrument`).
+        """
+        pointslen = len(points)
+        if pointslen == 1:
+            instrument.count('dots.' + self.linecap)
+        elif open:
+            instrument.count('caps.' + self.linecap, 2)
+            instrument.count('joins.' + self.linejoin, pointslen - 2)
+        else:
+            instrument.count('joins.' + self.linejoin, pointslen)
+        instrument.count('curves', types.count(segment_codes['curve']))
+
+    def _draw_parallels(self, points, open):
+        """
+        Fills the outer and inner buffers with the points of the contour
+        linejoins and linecaps.
+        """
+        pointslen = len(points)
         for i in range(pointslen):
             if open and (i == 0 or i == pointslen-1):
                 self._linecap(points[i], points[i+1 if i == 0 else i-1])
@@ -71,18 +309,6 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
             p2 = points[i+1] if i != pointslen-1 else points[0]
             self._linejoin(p0, p1, p2)
 
-        self.innerPath.reverse()
-        # merge paths if contour is an open contour
-        if open:
-            self.currentPath += self.innerPath
-        # else ask to draw two contours
-        else:
-            super().endPath()
-            self.beginPath()
-            self.currentPath = self.innerPath
-        super().endPath()
-        self.innerPath = None
-
     # LINEJOIN METHODS
 
     def _linejoin_bevel(self, p0, p1, p2):
@@ -91,24 +317,25 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
         i0 = math_.intersect(s0a, s1a)
         i1 = math_.intersect(s0b, s1b)
         if i0 is None:
-            self.currentPath.append((s0a[1], 'line', False, None, {}))
-            self.currentPath.append((s1a[0], 'line', False, None, {}))
+            self.outer.append(s0a[1], 'line')
+            self.outer.append(s1a[0], 'line')
         else:
-            self.currentPath.append((i0, 'line', False, None, {}))
+            self.outer.append(i0, 'line')
 
         if i1 is None:
-            self.innerPath.append((s0b[1], 'line', False, None, {}))
-            self.innerPath.append((s1b[0], 'line', False, None, {}))
+            self.inner.append(s0b[1], 'line')
+            self.inner.append(s1b[0], 'line')
         else:
-            self.innerPath.append((i1, 'line', False, None, {}))
+            self.inner.append(i1, 'line')
 
     def _linejoin_miter(self, p0, p1, p2):
         s0a, s0b = math_.double_parallel((p0[0], p1[0]), self.offset)
         s1a, s1b = math_.double_parallel((p1[0], p2[0]), self.offset)
         i0 = math_.intersect(s0a, s1a, force=True)
         i1 = math_.intersect(s0b, s1b, force=True)
-        self.currentPath.append((i0, 'line', False, None, {}))
-        self.innerPath.append((i1, 'line', False, None, {}))
+        # parallels of collinear segments never intersect, they meet at p1
+        self.outer.append(i0 or s0a[1], 'line')
+        self.inner.append(i1 or s0b[1], 'line')
 
     def _linejoin_round(self, p0, p1, p2):
         s0a, s0b = math_.double_parallel((p0[0], p1[0]), self.offset)
@@ -129,12 +356,12 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
             cp1 = math_.move(s0a[1], math_.rotate(math_.scale(a, alpha), 90))
             cp2 = math_.move(s1a[0], math_.rotate(math_.scale(b, alpha), -90))
 
-            self.currentPath.append((s0a[1], 'line', False, None, {}))
-            self.currentPath.append((cp1, None, False, None, {}))
-            self.currentPath.append((cp2, None, False, None, {}))
-            self.currentPath.append((s1a[0], 'curve', False, None, {}))
+            self.outer.append(s0a[1], 'line')
+            self.outer.append(cp1, None)
+            self.outer.append(cp2, None)
+            self.outer.append(s1a[0], 'curve')
         else:
-            self.currentPath.append((i0, 'line', False, None, {}))
+            self.outer.append(i0, 'line')
 
         if i1 is None:
             a = math_.vector(s0b[1], p1[0])
@@ -147,12 +374,12 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
             cp1 = math_.move(s0b[1], math_.rotate(math_.scale(a, alpha), -90))
             cp2 = math_.move(s1b[0], math_.rotate(math_.scale(b, alpha), 90))
 
-            self.innerPath.append((s0b[1], 'curve', False, None, {}))
-            self.innerPath.append((cp1, None, False, None, {}))
-            self.innerPath.append((cp2, None, False, None, {}))
-            self.innerPath.append((s1b[0], 'line', False, None, {}))
+            self.inner.append(s0b[1], 'curve')
+            self.inner.append(cp1, None)
+            self.inner.append(cp2, None)
+            self.inner.append(s1b[0], 'line')
         else:
-            self.innerPath.append((i1, 'line', False, None, {}))
+            self.inner.append(i1, 'line')
 
     # LINECAPS METHODS
 
@@ -160,46 +387,46 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
         v = math_.scale(math_.uvector(p0[0], p1[0]), self.offset)
         for theta, segmentType in [(-90, 'line'), (90, 'line')]:
             pt = math_.move(p0[0], math_.rotate(v, theta))
-            self.currentPath.append((pt, segmentType, False, None, {}))
+            self.outer.append(pt, segmentType)
 
     def _linecap_square(self, p0, p1):
         v0 = math_.scale(math_.uvector(p1[0], p0[0]), self.offset)
         v1 = math_.rotate(v0, 90.0)
         a = math_.move(p0[0], (v0[0] + v1[0], v0[1] + v1[1]))
         b = math_.move(p0[0], (v0[0] - v1[0], v0[1] - v1[1]))
-        self.currentPath.append((a, 'line', False, None, {}))
-        self.currentPath.append((b, 'line', False, None, {}))
+        self.outer.append(a, 'line')
+        self.outer.append(b, 'line')
 
     def _linecap_round(self, center, next):
         v1 = math_.scale(math_.uvector(next[0], center[0]), self.offset)
         v0 = math_.rotate(v1, 90)
         v2 = math_.rotate(v1, -90)
-        alpha = (4/3) * math.tan(math.acos(0)/4)
+        alpha = math_.kappa
         vcp0 = math_.rotate(math_.scale((-v0[0], -v0[1]), alpha), 90)
         vcp1 = math_.rotate(math_.scale((-v1[0], -v1[1]), alpha), -90)
 
         p0 = math_.move(center[0], v0)
-        self.currentPath.append((p0, 'line', False, None, {}))
+        self.outer.append(p0, 'line')
 
         p1 = math_.move(center[0], v1)
         cp1 = math_.move(p0, vcp0)
         cp2 = math_.move(p1, vcp1)
-        self.currentPath.append((cp1, None, False, None, {}))
-        self.currentPath.append((cp2, None, False, None, {}))
-        self.currentPath.append((p1, 'curve', False, None, {}))
+        self.outer.append(cp1, None)
+        self.outer.append(cp2, None)
+        self.outer.append(p1, 'curve')
 
         p2 = math_.move(center[0], v2)
         cp1 = math_.move(p1, (-vcp1[0], -vcp1[1]))
         cp2 = math_.move(p2, vcp0)
-        self.currentPath.append((cp1, None, False, None, {}))
-        self.currentPath.append((cp2, None, False, None, {}))
-        self.currentPath.append((p2, 'curve', False, None, {}))
+        self.outer.append(cp1, None)
+        self.outer.append(cp2, None)
+        self.outer.append(p2, 'curve')
 
     def _linecap_sharp(self, p0, p1):
         v = math_.scale(math_.uvector(p0[0], p1[0]), self.offset)
         for theta, segmentType in [(-90, 'line'), (180, 'line'), (90, 'line')]:
             pt = math_.move(p0[0], math_.rotate(v, theta))
-            self.currentPath.append((pt, segmentType, False, None, {}))
+            self.outer.append(pt, segmentType)
 
     # ONE POINT LINECAPS METHODS
 
@@ -215,13 +442,13 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
               (-self.offset, self.offset), (self.offset, self.offset)]
         for v in vs:
             pt = math_.move(p0[0], v)
-            self.currentPath.append((pt, 'line', False, None, {}))
+            self.outer.append(pt, 'line')
 
     def _one_point_round(self, center):
         v0 = (self.offset, 0)
         v1 = (0, -self.offset)
 
-        alpha = (4/3) * math.tan(math.acos(0)/4)
+        alpha = math_.kappa
         vcp0 = (-self.offset*alpha, 0)
         vcp1 = (0, -self.offset*alpha)
 
@@ -233,9 +460,9 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
 
             cp0 = math_.move(p0, vcp0)
             cp1 = math_.move(p1, vcp1)
-            self.currentPath.append((cp0, None, False, None, {}))
-            self.currentPath.append((cp1, None, False, None, {}))
-            self.currentPath.append((p1, 'curve', False, None, {}))
+            self.outer.append(cp0, None)
+            self.outer.append(cp1, None)
+            self.outer.append(p1, 'curve')
             vcp0, vcp1 = (-vcp1[0], -vcp1[1]), vcp0
 
     def _one_point_sharp(self, p0):
@@ -243,4 +470,4 @@ class StrokeToShapeSegmentPen(PointToSegmentPen):
               (0, self.offset), (self.offset, 0)]
         for v in vs:
             pt = math_.move(p0[0], v)
-            self.currentPath.append((pt, 'line', False, None, {}))
+            self.outer.append(pt, 'line')
@@ -1,11 +1,56 @@
+import json
+from collections import deque
+from functools import partial
+from itertools import islice
 from os import path
 
 from fontTools.misc.transform import Identity, Transform
-from defcon import Font
+from fontTools.pens.pointPen import PointToSegmentPen
+from fontTools.pens.recordingPen import RecordingPen, RecordingPointPen
 
 from px2ph.tools.glyphset import parse_range
-from px2ph.px2pt import px2pt
-from px2ph.pens import StrokeToShapeSegmentPen
+from px2ph.px2pt import (
+    concat_points, find_images_in_folder, grid_shape, image_shape,
+    iter_bands_chunks, iter_chunks, iter_layer_bands, iter_points_chunks,
+    load_points, merge_layers, nparray_to_points, px2pt, read_layers,
+    sheet_to_points, sheet_view, slice_points
+)
+from px2ph.pens import stroke_engines
+from px2ph.pens.strokePen import shared_pen
+from px2ph.utils import instrument
+from px2ph.utils.cache import GlyphCache, digest
+
+# defcon, px2ph.utils.binary, px2ph.utils.ufo (thus fontTools' ufoLib and
+# fontBuilder), px2ph.utils.overlap, px2ph.utils.trace and the process pool
+# are imported by the functions that need them to keep startup time low, none
+# of them is needed by every build.
+
+
+# font lib key where the digest of every built glyph is stored
+hashes_lib_key = 'com.px2ph.glyphHashes'
+
+
+def check_glyph_quantity(shape, glyph_set):
+    """
+    Asserts that layers of the given `(rows, columns)` shape (see
+    `grid_shape`) have a cell for every glyph of the glyph set. Only the last
+    row of layers with several rows of glyphs can have unused cells.
+    """
+    rows, columns = shape
+    unused = rows * columns - len(glyph_set)
+    assert unused == 0 or (rows > 1 and 0 < unused < columns), \
+        "glyphs and glyph_set doesn't have the same size"
+
+
+def new_font(info):
+    """
+    Returns a defcon Font holding the font info.
+    """
+    from defcon import Font
+
+    font = Font()
+    font.info.setDataFromSerialization(info)
+    return font
 
 
 def parse_font_info(data):
@@ -21,13 +66,250 @@ def parse_font_info(data):
     }
 
 
-def px2font(input, info, output):
-    glyphs_points = px2pt(**input)
-    glyph_set = parse_range(output['glyphSet'])
-    assert len(glyphs_points) == len(glyph_set), \
-        "glyphs and glyph_set doesn't have the same size"
+def draw_glyph(out_pen, contours, transform, stroke_width, vectorize,
+               segment_pen=None):
+    """
+    Strokes the glyph contours into the given point pen (or segment pen, see
+    StrokeToShapeSegmentPen's segment_pen argument).
+    The `engine` key of `vectorize` selects the stroke pen (see
+    `px2ph.pens.stroke_engines`) and, if its `removeOverlap` key is True, the
+    overlapping stroked contours are merged (see `union_contours`). Other
+    keys are passed to the pen.
+    The 'trace' engine draws the outlines of the glyph pixels instead of
+    stroking the contours (see `trace_glyph`), other keys are ignored.
+    """
+    instrument.count('glyphs')
+    if contours is None:
+        return
+    if instrument.enabled:
+        instrument.count('points', sum(len(contour) for contour in contours))
+    with instrument.span('stroke'):
+        stroke_glyph(out_pen, contours, transform, stroke_width, vectorize,
+                     segment_pen)
+
+
+def stroke_glyph(out_pen, contours, transform, stroke_width, vectorize,
+                 segment_pen=None):
+    """
+    Draws the glyph contours of `draw_glyph`.
+    """
+    vectorize = dict(vectorize)
+    engine = vectorize.pop('engine', 'pen')
+    if engine == 'trace':
+        from px2ph.utils.trace import trace_glyph
+
+        if segment_pen is not None:
+            out_pen = PointToSegmentPen(segment_pen(out_pen))
+        return trace_glyph(out_pen, contours, transform)
+    remove_overlap = vectorize.pop('removeOverlap', False)
+    try:
+        pen_class = stroke_engines[engine]
+    except KeyError:
+        raise NameError('No stroke engine: ' + engine)
+    # pens are reused from a glyph to the next, see `shared_pen`
+    pen = shared_pen(pen_class, stroke_width,
+                     tuple(sorted(vectorize.items())))
+    if remove_overlap:
+        recording = RecordingPointPen()
+        pen.reset(recording)
+    else:
+        pen.reset(out_pen, segment_pen)
+
+    for contour in contours:
+        pen.beginPath()
+        for point in contour:
+            pen.addPoint(transform.transformPoint(point[0]), point[1])
+        pen.endPath()
+
+    if remove_overlap:
+        from px2ph.utils.overlap import recorded_contours, union_contours
+
+        if segment_pen is not None:
+            out_pen = PointToSegmentPen(segment_pen(out_pen))
+        with instrument.span('removeOverlap'):
+            union_contours(recorded_contours(recording.value), out_pen)
+
+
+def stroke_chunk(chunk, draw, segment=False, instrumented=False):
+    """
+    Draws a chunk of packed glyphs (see `iter_chunks`) and returns the recorded
+    pen operations of each glyph, recorded with a segment pen if `segment` is
+    True or a point pen otherwise, and the instrumentation report of the chunk
+    if `instrumented` is True (see `px2ph.utils.instrument`), or None.
+    """
+    from px2ph.utils.binary import as_segment_pen
+
+    if instrumented:
+        instrument.enable()
+    recordings = []
+    for contours in merge_layers(chunk):
+        if segment:
+            pen = RecordingPen()
+            draw(pen, contours, segment_pen=as_segment_pen)
+        else:
+            pen = RecordingPointPen()
+            draw(pen, contours)
+        recordings.append(pen.value)
+    return recordings, instrument.report() if instrumented else None
+
+
+def replay_recording(recording, pen, segment=False):
+    """
+    Replays the pen operations recorded by `stroke_chunk` into `pen`.
+    """
+    recording_pen = RecordingPen() if segment else RecordingPointPen()
+    recording_pen.value = recording
+    recording_pen.replay(pen)
+
+
+def input_chunks(input, glyph_set, chunk_size=256):
+    """
+    Checks the input has a cell for every glyph of the glyph set and returns
+    an iterator over its chunks of packed points (see `iter_chunks`), read
+    from the `points` file written by px2pt if given, otherwise extracted
+    from the decoded layers, one row of glyphs at a time if the `bands`
+    input option is set and there is no `cache` (see `iter_bands_chunks`).
+    """
+    grid, margin = input['grid'], input.get('margin', [1, 1])
+    if input.get('points'):
+        layers, shape = load_points(input['points'], grid, margin)
+        check_glyph_quantity(shape, glyph_set)
+        return iter_points_chunks(layers, chunk_size)
+
+    if input.get('bands') and not input.get('cache'):
+        check_glyph_quantity(grid_shape(
+            image_shape(find_images_in_folder(input['folder'])[0]),
+            grid, margin), glyph_set)
+        return iter_bands_chunks(input['folder'], grid, margin, chunk_size)
+
+    layers = read_layers(input['folder'], input.get('cache'))
+    check_glyph_quantity(grid_shape(layers[0].shape, grid, margin), glyph_set)
+    return iter_chunks(layers, grid, margin, chunk_size)
+
+
+def glyph_sources(input, glyph_set):
+    """
+    Checks the input has a cell for every glyph of the glyph set and returns
+    two functions taking a glyph index: one returns the bytes identifying the
+    glyph source in every layer, the other the packed points of the glyph in
+    every layer (see `sheet_to_points`).
+    If the `bands` input option is set and there is no `cache`, layers are
+    decoded one row of glyphs at a time (see `iter_layer_bands`) and glyphs
+    have to be requested in order.
+    """
+    grid, margin = input['grid'], input.get('margin', [1, 1])
+    if input.get('points'):
+        layers, shape = load_points(input['points'], grid, margin)
+        check_glyph_quantity(shape, glyph_set)
+
+        def packed(index):
+            return [slice_points(layer, index, index + 1) for layer in layers]
+
+        def parts(index):
+            return [part.tobytes() for coords, moves, _ in packed(index)
+                    for part in (coords, moves)]
+
+        return parts, packed
+
+    if input.get('bands') and not input.get('cache'):
+        layers_paths = find_images_in_folder(input['folder'])
+        rows, columns = grid_shape(image_shape(layers_paths[0]), grid, margin)
+        check_glyph_quantity((rows, columns), glyph_set)
+        bands = zip(*(iter_layer_bands(layer_path, grid, margin)
+                      for layer_path in layers_paths))
+        row, views = -1, None
+
+        def cells(index):
+            nonlocal row, views
+            while row < index // columns:
+                views = [sheet_view(band, grid, margin)
+                         for band in next(bands)]
+                row += 1
+            return [view[index % columns] for view in views]
+    else:
+        layers = read_layers(input['folder'], input.get('cache'))
+        check_glyph_quantity(grid_shape(layers[0].shape, grid, margin),
+                             glyph_set)
+        views = [sheet_view(nparray, grid, margin) for nparray in layers]
+
+        def cells(index):
+            return [view[index] for view in views]
+
+    return (lambda index: [cell.tobytes() for cell in cells(index)],
+            lambda index: [sheet_to_points(cell, grid, [0, 0])
+                           for cell in cells(index)])
+
+
+def glyphs_chunks(glyphs, chunk_size=256):
+    """
+    Yields the chunks of packed points (see `input_chunks`) of glyphs given
+    as their packed points in every layer (see `glyph_sources`).
+    """
+    for start in range(0, len(glyphs), chunk_size):
+        yield [concat_points(layer)
+               for layer in zip(*glyphs[start:start + chunk_size])]
+
+
+def iter_drawings(chunks, draw, jobs=None, segment=False):
+    """
+    Yields for every glyph of the chunks of packed points (see
+    `input_chunks`) a function to be called with a pen (a segment pen if
+    `segment` is True, a point pen otherwise) to draw the glyph outlines.
+    With `jobs` > 1, chunks are stroked by a pool of processes and their
+    recorded pen operations are yielded in the glyphs order, so the drawings
+    are the same as serially drawn ones.
+    """
+    from px2ph.utils.binary import as_segment_pen
+
+    if jobs is None or jobs <= 1:
+        for chunk in chunks:
+            for contours in merge_layers(chunk):
+                if segment:
+                    yield partial(draw, contours=contours,
+                                  segment_pen=as_segment_pen)
+                else:
+                    yield partial(draw, contours=contours)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    def stroked(future):
+        recordings, report = future.result()
+        # spans and counters of the processes add up to the main ones
+        if report is not None:
+            instrument.merge(report)
+        return recordings
+
+    with ProcessPoolExecutor(jobs) as executor:
+        # only a few chunks are submitted in advance to bound memory usage
+        pending = deque()
+        for chunk in chunks:
+            if len(pending) >= jobs * 2:
+                for recording in stroked(pending.popleft()):
+                    yield partial(replay_recording, recording, segment=segment)
+            pending.append(executor.submit(stroke_chunk, chunk, draw, segment,
+                                           instrument.enabled))
+        while pending:
+            for recording in stroked(pending.popleft()):
+                yield partial(replay_recording, recording, segment=segment)
+
+
+def font_setup(input, info, output):
+    """
+    Returns the glyph set, the parsed font info, the function drawing a
+    glyph's contours with a pen and the drawing options (everything besides
+    the pixels that changes the drawn glyphs) of a font config.
+    """
+    with instrument.span('parse_range'):
+        glyph_set = parse_range(output['glyphSet'])
 
     px_size = info['pixelSizeInEm']
+    draw_options = {
+        'vectorize': output['vectorize'],
+        'pixelSizeInEm': px_size,
+        'descender': info['descender'],
+        'grid': input['grid'],
+    }
     scale_tf = Transform(px_size, 0, 0, px_size, 0, 0)
     # Transformation that inverts the y axis coordinates, translate so the
     # descender part of the glyph falls beyond the baseline and translate
@@ -35,25 +317,242 @@ def px2font(input, info, output):
     UFO_tf = scale_tf.transform(
         (1, 0, 0, -1, 0.5, input['grid'][1] + info['descender'] - 0.5))
 
-    info = parse_font_info(info)
+    draw = partial(draw_glyph, transform=UFO_tf, stroke_width=px_size,
+                   vectorize=output['vectorize'])
+
+    return glyph_set, parse_font_info(dict(info)), draw, draw_options
+
+
+def glyph_digest(draw_options, name, glyph_repr, parts):
+    """
+    Returns the digest identifying a glyph: its name, unicode, drawing options
+    (serialized as json) and the bytes of its source in every layer (see
+    `glyph_sources`).
+    """
+    return digest(draw_options, name, str(glyph_repr), *parts)
+
+
+def cell_contours(views, index, grid):
+    """
+    Returns the contours of a glyph from its cell in every layer view (see
+    `sheet_view`) or None if the glyph is empty.
+    """
+    contours = [part for part in (nparray_to_points(view[index], grid)
+                                  for view in views)
+                if part is not None]
+    return contours or None
 
-    font = Font()
-    font.info.setDataFromSerialization(info)
+
+def px2font(input, info, output, cache=False, jobs=None):
+    """
+    Builds a UFO font from the pixel layers.
+    If `cache` is True, the font is incrementally rebuilt (see `update_font`),
+    unless the output has `masters` (see `variable_font`) or the `writer`
+    output option is 'ufoLib' (see `write_font`).
+    `jobs` is the number of processes stroking the glyphs.
+    """
+    glyph_set, info, draw, draw_options = font_setup(input, info, output)
+    font_path = path.abspath(output['folder'])
+
+    chunk_size = output.get('chunkSize')
+    if output.get('masters'):
+        from px2ph.variable import variable_font
+
+        return variable_font(info, font_path, input, glyph_set, draw, output,
+                             jobs)
+    if output.get('format', 'ufo') != 'ufo':
+        font_path = path.abspath(output.get('file') or '{}.{}'.format(
+            path.splitext(font_path)[0], output['format']))
+        return compile_font(info, font_path, input, glyph_set, draw,
+                            output['format'], chunk_size or 256, jobs)
+    # the 'ufoLib' writer always writes the whole font
+    if cache and output.get('writer') != 'ufoLib':
+        cache_options = output.get('cache', {})
+        cache_folder = cache_options.get(
+            'folder', path.join(path.dirname(font_path), '.px2ph-cache'))
+        glyph_cache = GlyphCache(cache_folder,
+                                 cache_options.get('maxSize', 256),
+                                 cache_options.get('maxAge', 30))
+        return update_font(new_font(info), font_path, input, glyph_set, draw,
+                           glyph_cache, draw_options, chunk_size, jobs)
+    if output.get('writer') == 'ufoLib':
+        return write_font(info, font_path, input, glyph_set, draw,
+                          chunk_size or 256, output.get('writerJobs'), jobs)
+    if chunk_size is not None or jobs is not None:
+        return stream_font(new_font(info), font_path, input, glyph_set,
+                           chunk_size or 256, draw, jobs)
+
+    font = new_font(info)
+    grid, margin = input['grid'], input.get('margin', [1, 1])
+    if input.get('points'):
+        layers, shape = load_points(input['points'], grid, margin)
+        check_glyph_quantity(shape, glyph_set)
+        glyphs_points = merge_layers(layers)
+    else:
+        check_glyph_quantity(grid_shape(
+            image_shape(find_images_in_folder(input['folder'])[0]),
+            grid, margin), glyph_set)
+        glyphs_points = px2pt(**input)
 
     for glyph_repr, contours in zip(glyph_set, glyphs_points):
         glyph = font.newGlyph(glyph_set[glyph_repr]['name'])
         glyph.unicodes = [glyph_repr]
-        out_pen = glyph.getPointPen()
-        pen = StrokeToShapeSegmentPen(out_pen, px_size, **output['vectorize'])
+        draw(glyph.getPointPen(), contours)
+
+    with instrument.span('save'):
+        font.save(path=font_path)
+
+
+def stream_font(font, font_path, input, glyph_set, chunk_size, draw,
+                jobs=None):
+    """
+    Writes the font glyphs `chunk_size` at a time: points are extracted (see
+    `input_chunks`), drawn in a freshly opened font and saved before the next
+    chunk is processed, so neither points nor glyph objects of the whole font
+    are kept in memory.
+    Glyphs are stroked by `jobs` processes (see `iter_drawings`).
+    """
+    from defcon import Font
+
+    chunks = input_chunks(input, glyph_set, chunk_size)
+
+    # write the font info and an empty glyph set
+    with instrument.span('save'):
+        font.save(path=font_path)
+
+    drawings = iter_drawings(chunks, draw, jobs)
+    glyph_reprs = iter(glyph_set)
+    for start in range(0, len(glyph_set), chunk_size):
+        # a font opened from disk lazily loads its glyphs and only saves
+        # the modified ones
+        font = Font(font_path)
+        for glyph_repr, draw_points in zip(islice(glyph_reprs, chunk_size),
+                                           drawings):
+            glyph = font.newGlyph(glyph_set[glyph_repr]['name'])
+            glyph.unicodes = [glyph_repr]
+            draw_points(glyph.getPointPen())
+        with instrument.span('save'):
+            font.save()
+
 
-        for contour in contours:
-            # contour = UFO_tf.transformPoints(contour)
-            pen.beginPath()
-            for point in contour:
-                pen.addPoint(UFO_tf.transformPoint(point[0]), point[1])
-            pen.endPath()
+def write_font(info, font_path, input, glyph_set, draw, chunk_size=256,
+               writer_jobs=None, jobs=None):
+    """
+    Writes the font with a `UFOStreamWriter` instead of saving a defcon Font:
+    glyphs are extracted chunk by chunk (see `input_chunks`) and serialized
+    as soon as they are drawn, optionally by `writer_jobs` processes.
+    Glyphs are stroked by `jobs` processes (see `iter_drawings`).
+    """
+    from px2ph.utils.ufo import UFOStreamWriter, font_info
 
-    font.save(path=path.abspath(output['folder']))
+    chunks = input_chunks(input, glyph_set, chunk_size)
+    writer = UFOStreamWriter(font_path, font_info(info), writer_jobs)
+    drawings = iter_drawings(chunks, draw, jobs)
+    for glyph_repr, draw_points in zip(glyph_set, drawings):
+        writer.write_glyph(glyph_set[glyph_repr]['name'], [glyph_repr],
+                           draw_points)
+    with instrument.span('save'):
+        writer.close()
+
+
+def compile_font(info, font_path, input, glyph_set, draw, format,
+                 chunk_size=256, jobs=None):
+    """
+    Compiles a 'ttf' or 'otf' font file straight from the glyph outlines,
+    without writing a UFO.
+    Glyphs are stroked by `jobs` processes (see `iter_drawings`).
+    """
+    from px2ph.utils.binary import BinaryFontBuilder
+
+    chunks = input_chunks(input, glyph_set, chunk_size)
+    builder = BinaryFontBuilder(info, format)
+    drawings = iter_drawings(chunks, draw, jobs, segment=True)
+    for glyph_repr, draw_segments in zip(glyph_set, drawings):
+        pen = builder.glyph_pen()
+        draw_segments(pen)
+        builder.add_glyph(glyph_set[glyph_repr]['name'], [glyph_repr], pen)
+    with instrument.span('save'):
+        builder.save(font_path)
+
+
+def update_font(font, font_path, input, glyph_set, draw, glyph_cache,
+                draw_options, chunk_size=None, jobs=None):
+    """
+    Incrementally rebuilds the font saved at `font_path`.
+    Each glyph is identified by a digest of its cells pixels (or points, see
+    `glyph_sources`) across layers and of the drawing options. Only glyphs
+    whose digest differs from the previous build are redrawn, or replayed
+    from `glyph_cache`, and rewritten on disk.
+    If `chunk_size` is given, the font is saved and reopened every
+    `chunk_size` rewritten glyphs to bound memory usage.
+    Glyphs missing from the cache are stroked by `jobs` processes (see
+    `iter_drawings`).
+    """
+    from defcon import Font
+
+    parts, packed = glyph_sources(input, glyph_set)
+
+    if not path.isdir(font_path):
+        with instrument.span('save'):
+            font.save(path=font_path)
+    info = font.info.getDataForSerialization()
+    font = Font(font_path)
+    font.info.setDataFromSerialization(info)
+
+    built = font.lib.get(hashes_lib_key, {})
+    hashes = {}
+    draw_options = json.dumps(draw_options, sort_keys=True)
+    # glyphs sources are read in order, the points of the modified glyphs
+    # are kept
+    modified, sources = [], []
+    for index, glyph_repr in enumerate(glyph_set):
+        name = glyph_set[glyph_repr]['name']
+        key = glyph_digest(draw_options, name, glyph_repr, parts(index))
+        hashes[name] = key
+        if built.get(name) != key or name not in font:
+            modified.append((glyph_repr, name, key))
+            sources.append(packed(index))
+
+    # glyphs missing from the cache are drawn in the order they are rewritten
+    missing = [n for n, (_, _, key) in enumerate(modified)
+               if key not in glyph_cache]
+    drawings = iter_drawings(
+        glyphs_chunks([sources[n] for n in missing], chunk_size or 256),
+        draw, jobs)
+    missing = set(missing)
+
+    rewritten = 0
+    for n, (glyph_repr, name, key) in enumerate(modified):
+        recording = None if n in missing else glyph_cache.get(key)
+        if recording is None:
+            pen = RecordingPointPen()
+            if n in missing:
+                next(drawings)(pen)
+            else:
+                # unreadable cache entry
+                draw(pen, merge_layers(sources[n])[0])
+            recording = pen.value
+            glyph_cache.set(key, recording)
+
+        glyph = font.newGlyph(name)
+        glyph.unicodes = [glyph_repr]
+        pen = RecordingPointPen()
+        pen.value = recording
+        pen.replay(glyph.getPointPen())
+
+        rewritten += 1
+        if chunk_size is not None and rewritten % chunk_size == 0:
+            with instrument.span('save'):
+                font.save()
+            font = Font(font_path)
+
+    for name in set(font.keys()) - set(hashes):
+        del font[name]
+    font.glyphOrder = list(hashes)
+    font.lib[hashes_lib_key] = hashes
+    with instrument.span('save'):
+        font.save()
+    glyph_cache.evict()
 
 
 if __name__ == '__main__':
@@ -65,10 +564,57 @@ if __name__ == '__main__':
         prog='px2ph.tools.grid',
         description='png font grid generator'
     )
+    parser.add_argument('command',
+                        nargs='?',
+                        choices=('build', 'watch'),
+                        default='build',
+                        help='build the font once, or build it then rebuild '
+                             'the modified glyphs whenever the config or '
+                             'layers change')
     parser.add_argument('-c', '--config_file',
                         required=True,
                         help='path to a yaml file containing the grid options',
                         type=path.abspath)
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='rebuild every glyph instead of only the ones '
+                             'modified since the previous build')
+    parser.add_argument('-j', '--jobs',
+                        help='number of processes stroking the glyphs',
+                        type=int)
+    parser.add_argument('--interval',
+                        help='seconds between two checks of the watched files',
+                        type=float,
+                        default=0.1)
+    parser.add_argument('--profile',
+                        help='file path where to save the cProfile stats of '
+                             'the build',
+                        type=path.abspath)
+    parser.add_argument('--report',
+                        help='file path where to save the time spent in every '
+                             'stage of the build and its counters as json',
+                        type=path.abspath)
     args = parser.parse_args()
 
-    px2font(**get_yaml(args.config_file))
+    if args.command == 'watch':
+        from px2ph.watch import watch
+
+        watch(args.config_file, args.interval, args.jobs)
+    else:
+        if args.report is not None:
+            instrument.enable()
+        if args.profile is not None:
+            from cProfile import Profile
+
+            profile = Profile()
+            profile.enable()
+
+        with instrument.span('build'):
+            px2font(**get_yaml(args.config_file), cache=not args.no_cache,
+                    jobs=args.jobs)
+
+        if args.profile is not None:
+            profile.disable()
+            profile.dump_stats(args.profile)
+        if args.report is not None:
+            instrument.save_report(args.report)
@@ -1,47 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from os import listdir, path
 
-from numpy import asarray
+from numpy import (
+    argsort, asarray, bincount, concatenate, cumsum, int16, lexsort, load,
+    packbits, savez, stack, unpackbits, zeros
+)
+from numpy.lib.stride_tricks import as_strided
 from PIL import Image
 
+from px2ph.utils import instrument
+from px2ph.utils.cache import LayerCache
+from px2ph.utils.png import iter_png_bands
+
 
 ext = '.png'
 
 
 def find_images_in_folder(folder):
     """
-    Searches for png files in the provided folder and returns their absolute path.
+    Searches for png files in the provided folder and returns their absolute path
+    sorted by file name so that layers always come in the same order.
     """
     return [
-        path.join(folder, file) for file in listdir(folder)
+        path.join(folder, file) for file in sorted(listdir(folder))
         if path.isfile(path.join(folder, file)) and path.splitext(file)[1] == ext
     ]
 
 
-def get_image_as_nparray(filepath):
+def get_image_as_nparray(filepath, cache=None):
     """
     Reads an image file, converts it to greyscale then returns it as a numpy array.
+    If `cache` is the path of a folder, decoded arrays are stored there and
+    read memory-mapped on later calls until the image changes (see
+    `px2ph.utils.cache.LayerCache`).
     """
-    with Image.open(filepath) as img:
+    if cache is not None:
+        return LayerCache(cache).get(filepath, get_image_as_nparray)
+    with instrument.span('decode'), Image.open(filepath) as img:
         return asarray(img.convert('LA'))
 
 
+def image_shape(filepath):
+    """
+    Returns the `(height, width)` shape of an image without decoding it.
+    """
+    with Image.open(filepath) as img:
+        return img.size[1], img.size[0]
+
+
+def grid_shape(shape, grid, margin=[1, 1]):
+    """
+    Returns the number of rows and columns of glyphs of a layer with the given
+    `(height, width)` shape.
+    Glyph cells are separated by margins, layers have a margin on every side,
+    the bottom one being optional.
+    """
+    rows = shape[0] // (grid[1] + margin[1])
+    columns = int((shape[1] - margin[0]) / (grid[0] + margin[0]))
+    return rows, columns
+
+
 def split_nparray(nparray, grid, margin=[1, 1]):
     """
-    Splits the numpy array into several chunks representing a glyph.
+    Splits the numpy array into several chunks representing a glyph, row by
+    row.
     """
-    width = grid[0] + margin[0]
-    glyph_quantity = int((nparray.shape[1] - margin[0]) / width)
+    width, height = grid[0] + margin[0], grid[1] + margin[1]
+    rows, columns = grid_shape(nparray.shape, grid, margin)
     return [
-        nparray[margin[1]:grid[1] + margin[1], n:n + grid[0]]
-        for n in range(1, glyph_quantity * width, width)
+        nparray[y:y + grid[1], x:x + grid[0]]
+        for y in range(margin[1], rows * height, height)
+        for x in range(margin[0], columns * width, width)
     ]
 
 
+def grid_view(nparray, grid, margin=[1, 1]):
+    """
+    Returns a read-only `(rows, columns, grid_h, grid_w, 2)` view of the numpy
+    array where margins between glyphs are skipped by striding (no copy).
+    """
+    width, height = grid[0] + margin[0], grid[1] + margin[1]
+    rows, columns = grid_shape(nparray.shape, grid, margin)
+    cells = nparray[margin[1]:, margin[0]:]
+    row_stride, col_stride, channel_stride = cells.strides
+    return as_strided(
+        cells,
+        shape=(rows, columns, grid[1], grid[0], cells.shape[2]),
+        strides=(row_stride * height, col_stride * width, row_stride,
+                 col_stride, channel_stride),
+        writeable=False)
+
+
+def sheet_view(nparray, grid, margin=[1, 1]):
+    """
+    Returns a read-only `(glyphs, grid_h, grid_w, 2)` view of the numpy array
+    where margins between glyphs are skipped by striding (no copy).
+    Glyphs of layers with several rows can't be strided as one axis, they are
+    copied.
+    """
+    cells = grid_view(nparray, grid, margin)
+    if cells.shape[0] == 1:
+        return cells[0]
+    return cells.reshape(-1, *cells.shape[2:])
+
+
 def nparray_to_points(nparray, grid):
     """
     Arranges the pixels in order of brightness and returns an array of
     points positions specifying a path.
     Coordinates origin is top-left.
+
+    NumPy implementation of `nparray_to_points_loop`: pixels are visited
+    column by column and sorted with a stable sort so both functions return
+    the exact same list.
+    """
+    with instrument.span('extract'):
+        nparray = nparray[:grid[1], :grid[0]]
+        # transposing makes nonzero() iterate over columns first, like the
+        # loop
+        xs, ys = nparray[:, :, 1].T.nonzero()
+        if len(xs) == 0:
+            return None
+
+        intensities = nparray[ys, xs, 0]
+        order = argsort(intensities, kind='stable')
+        moves = intensities[order] == 0
+        return [
+            ([x, y], 'move' if move else 'line')
+            for x, y, move in zip(xs[order].tolist(), ys[order].tolist(),
+                                  moves.tolist())
+        ]
+
+
+def nparray_to_points_loop(nparray, grid):
+    """
+    Pure python reference implementation of `nparray_to_points`.
     """
     points = [
         {'pos': ([posx, posy], 'move' if nparray[posy, posx][0] == 0 else 'line'),
@@ -58,26 +152,238 @@ def nparray_to_points(nparray, grid):
         return None
 
 
-def px2pt(folder, grid, margin=[1, 1]):
+def sheet_to_points(nparray, grid, margin=[1, 1]):
+    """
+    Batch version of `nparray_to_points` working on a whole layer at once.
+
+    Returns a ragged structure `(coords, moves, offsets)` where `coords` is a
+    flat `(points, 2)` array of x, y positions, `moves` a boolean array flagging
+    'move' points and points of glyph `n` are found in
+    `coords[offsets[n]:offsets[n + 1]]`.
+    """
+    with instrument.span('extract'):
+        cells = grid_view(nparray, grid, margin)
+        rows, columns = cells.shape[:2]
+        quantity = rows * columns
+        row_idx, col_idx, xs, ys = \
+            cells[:, :, :, :, 1].transpose(0, 1, 3, 2).nonzero()
+        intensities = cells[row_idx, col_idx, ys, xs, 0]
+        glyph_idx = row_idx * columns + col_idx
+        # sorted by glyph then intensity, lexsort is stable so column order
+        # stays
+        order = lexsort((intensities, glyph_idx))
+
+        coords = stack((xs[order], ys[order]), axis=1).astype(int16)
+        moves = intensities[order] == 0
+        offsets = zeros(quantity + 1, dtype=int)
+        cumsum(bincount(glyph_idx, minlength=quantity), out=offsets[1:])
+        return coords, moves, offsets
+
+
+def concat_points(packed):
+    """
+    Concatenates the outputs of `sheet_to_points` of consecutive glyphs.
+    """
+    coords, moves, offsets = zip(*packed)
+    # offsets of each part are shifted by the points count of previous parts
+    shifted, start = [], 0
+    for part in offsets:
+        shifted.append(part[:-1] + start)
+        start += part[-1]
+    shifted.append([start])
+    return concatenate(coords), concatenate(moves), concatenate(shifted)
+
+
+def unpack_points(coords, moves, offsets):
+    """
+    Converts the ragged structure returned by `sheet_to_points` to a list of
+    glyphs formatted like `nparray_to_points` outputs.
+    """
+    coords = coords.tolist()
+    segment_types = ['move' if move else 'line' for move in moves.tolist()]
+    offsets = offsets.tolist()
+    return [
+        [(coords[n], segment_types[n]) for n in range(start, end)]
+        if start != end else None
+        for start, end in zip(offsets[:-1], offsets[1:])
+    ]
+
+
+def layer_to_points(nparray, grid, margin=[1, 1], engine='batch'):
+    """
+    Returns the list of points (or None) of every glyph found in a layer.
+    """
+    if engine == 'batch':
+        return unpack_points(*sheet_to_points(nparray, grid, margin))
+    try:
+        to_points = engines[engine]
+    except KeyError:
+        raise NameError('No points extraction engine: ' + engine)
+    return [to_points(glyph_nparray, grid)
+            for glyph_nparray in split_nparray(nparray, grid, margin)]
+
+
+engines = {
+    'numpy': nparray_to_points,
+    'loop': nparray_to_points_loop,
+}
+
+
+def iter_layer_bands(filepath, grid, margin=[1, 1]):
+    """
+    Yields the rows of glyphs of a layer image, each one as a numpy array
+    holding its top margin and cells, decoded band by band (see
+    `px2ph.utils.png.iter_png_bands`) so that only one row of glyphs is held
+    in memory.
+    """
+    height = grid[1] + margin[1]
+    bands = iter_png_bands(filepath, height)
+    while True:
+        # only the decoding is timed, not the consumer of the bands
+        with instrument.span('decode'):
+            band = next(bands, None)
+        if band is None:
+            return
+        if band.shape[0] == height:
+            yield band
+
+
+def extract_layer(layer_path, grid, margin=[1, 1], engine='batch',
+                  cache=None, bands=False):
+    """
+    Decodes a layer image and returns the points of every glyph it contains.
+    With the 'batch' engine the compact output of `sheet_to_points` is returned
+    as is, since it is mostly computed without holding the GIL.
+    If `bands` is True and there is no `cache`, the image is decoded one row
+    of glyphs at a time (see `iter_layer_bands`).
+    """
+    if bands and cache is None:
+        nparrays = iter_layer_bands(layer_path, grid, margin)
+    else:
+        nparrays = [get_image_as_nparray(layer_path, cache)]
+
+    if engine == 'batch':
+        return concat_points([sheet_to_points(nparray, grid, margin)
+                              for nparray in nparrays])
+    return [points for nparray in nparrays
+            for points in layer_to_points(nparray, grid, margin, engine)]
+
+
+def px2pt(folder, grid, margin=[1, 1], engine='batch', workers=None,
+          cache=None, bands=False):
     """
     Reads several images and parse pixel position in absolute position
     for each glyphs.
+    `engine` selects the points extraction method: 'batch' extracts a whole
+    layer with `sheet_to_points`, other values are keys of `engines`.
+    If `workers` is given, layers are decoded and extracted in a pool of
+    `workers` threads (Pillow and NumPy release the GIL), results are still
+    merged in layer order.
+    `cache` is an optional folder where decoded layers are cached (see
+    `get_image_as_nparray`).
+    If `bands` is True, layers are decoded one row of glyphs at a time to
+    bound memory usage (see `extract_layer`).
+    Glyphs of layers with several rows are ordered row by row.
 
     Returns an array of glyphs represented by an array of series of points (one
     for each given layer)
     """
+    layers = extract_layers(folder, grid, margin, engine, workers, cache,
+                            bands)
+    return merge_layers(layers, packed=engine == 'batch')
+
+
+def extract_layers(folder, grid, margin=[1, 1], engine='batch', workers=None,
+                   cache=None, bands=False):
+    """
+    Yields the points of every layer of the folder in order (see
+    `extract_layer` and `px2pt` for the arguments).
+    """
     layers_paths = find_images_in_folder(folder)
+    instrument.count('layers', len(layers_paths))
+    extract = partial(extract_layer, grid=grid, margin=margin, engine=engine,
+                      cache=cache, bands=bands)
+
+    if workers is not None and workers > 1 and len(layers_paths) > 1:
+        with ThreadPoolExecutor(min(workers, len(layers_paths))) as executor:
+            yield from executor.map(extract, layers_paths)
+    else:
+        yield from map(extract, layers_paths)
+
+
+def save_points(filepath, layers, grid, margin=[1, 1], shape=None):
+    """
+    Saves the packed points of every layer (see `sheet_to_points`) as a
+    `.npz` file: int16 coordinates, a bitmask of 'move' points and the
+    offsets of every glyph of every layer, along with the grid, margin and
+    the `(rows, columns)` shape of the layers.
+    """
+    coords = concatenate([layer[0] for layer in layers])
+    moves = concatenate([layer[1] for layer in layers])
+    # offsets of every layer are shifted to index the concatenated points
+    starts = cumsum([0] + [len(layer[0]) for layer in layers[:-1]])
+    offsets = stack([layer[2] + start for layer, start in zip(layers, starts)])
+    savez(filepath, coords=coords, moves=packbits(moves), offsets=offsets,
+          grid=grid, margin=margin,
+          shape=shape or (1, offsets.shape[1] - 1))
+
+
+def load_points(filepath, grid, margin=[1, 1]):
+    """
+    Returns the packed points of every layer saved by `save_points` and the
+    `(rows, columns)` shape of the layers.
+    """
+    with load(filepath) as data:
+        if data['grid'].tolist() != list(grid) \
+                or data['margin'].tolist() != list(margin):
+            raise ValueError('{} was extracted with grid {} and margin {}'
+                             .format(filepath, data['grid'].tolist(),
+                                     data['margin'].tolist()))
+        coords, offsets = data['coords'], data['offsets']
+        instrument.count('layers', len(offsets))
+        moves = unpackbits(data['moves'], count=len(coords)).astype(bool)
+        shape = tuple(data['shape'].tolist())
+    return [slice_points((coords, moves, layer_offsets), 0,
+                         len(layer_offsets) - 1)
+            for layer_offsets in offsets], shape
 
-    glyphs = None
-    for i, layer_path in enumerate(layers_paths):
-        nparray = get_image_as_nparray(layer_path)
-        splitted_nparray = split_nparray(nparray, grid)
 
+def slice_points(packed, start, end):
+    """
+    Returns the packed points (see `sheet_to_points`) of the glyphs from
+    `start` to `end` (excluded).
+    """
+    coords, moves, offsets = packed
+    first, last = offsets[start], offsets[end]
+    return (coords[first:last], moves[first:last],
+            offsets[start:end + 1] - first)
+
+
+def iter_points_chunks(layers, chunk_size=256):
+    """
+    Same as `iter_chunks` for already packed layers (see `load_points`).
+    """
+    quantity = len(layers[0][2]) - 1
+    for start in range(0, quantity, chunk_size):
+        end = min(start + chunk_size, quantity)
+        yield [slice_points(layer, start, end) for layer in layers]
+
+
+def merge_layers(layers, packed=True):
+    """
+    Merges the glyphs of every layer: returns a list of glyphs represented by
+    an array of series of points (one per layer where the glyph isn't empty)
+    or None.
+    Layers are packed points (see `sheet_to_points`) unless `packed` is False.
+    """
+    glyphs = None
+    for layer in layers:
+        if packed:
+            layer = unpack_points(*layer)
         if glyphs is None:
-            glyphs = [None for n in splitted_nparray]
+            glyphs = [None for n in layer]
 
-        for index, glyph_nparray in enumerate(splitted_nparray):
-            glyph_part = nparray_to_points(glyph_nparray, grid)
+        for index, glyph_part in enumerate(layer):
             if glyph_part is not None:
                 if glyphs[index] is None:
                     glyphs[index] = []
@@ -86,6 +392,59 @@ def px2pt(folder, grid, margin=[1, 1]):
     return glyphs
 
 
+def read_layers(folder, cache=None):
+    """
+    Decodes every layer image of the folder as a numpy array.
+    """
+    layers_paths = find_images_in_folder(folder)
+    instrument.count('layers', len(layers_paths))
+    return [get_image_as_nparray(layer_path, cache)
+            for layer_path in layers_paths]
+
+
+def iter_chunks(layers, grid, margin=[1, 1], chunk_size=256):
+    """
+    Yields, for every chunk of at most `chunk_size` consecutive glyphs of a
+    row, the list of packed points (see `sheet_to_points`) of each layer.
+    """
+    width, height = grid[0] + margin[0], grid[1] + margin[1]
+    rows, columns = grid_shape(layers[0].shape, grid, margin)
+
+    for top in range(0, rows * height, height):
+        for start in range(0, columns, chunk_size):
+            end = min(start + chunk_size, columns)
+            yield [
+                sheet_to_points(
+                    nparray[top:top + height + margin[1],
+                            start * width:end * width + margin[0]],
+                    grid, margin)
+                for nparray in layers
+            ]
+
+
+def iter_bands_chunks(folder, grid, margin=[1, 1], chunk_size=256):
+    """
+    Same as `iter_chunks` for the layers of a folder decoded one row of glyphs
+    at a time (see `iter_layer_bands`).
+    """
+    layers_paths = find_images_in_folder(folder)
+    instrument.count('layers', len(layers_paths))
+    for bands in zip(*(iter_layer_bands(layer_path, grid, margin)
+                       for layer_path in layers_paths)):
+        yield from iter_chunks(bands, grid, margin, chunk_size)
+
+
+def iter_glyphs(layers, grid, margin=[1, 1], chunk_size=256):
+    """
+    Generator version of `px2pt` that takes decoded layers (see `read_layers`)
+    and yields glyphs one by one.
+    Points are extracted `chunk_size` glyphs at a time so that only the points
+    of the current chunk live in memory as python lists.
+    """
+    for chunk in iter_chunks(layers, grid, margin, chunk_size):
+        yield from merge_layers(chunk)
+
+
 if __name__ == '__main__':
     from os.path import abspath
     from argparse import ArgumentParser
@@ -102,14 +461,31 @@ if __name__ == '__main__':
                         help='path to a yaml file containing an input key with pixel informations',
                         type=abspath)
     parser.add_argument('-o', '--output',
-                        help='file path where to dump the result as yaml',
+                        help='file path where to dump the result as yaml, or '
+                             'as binary points if it ends with .npz, which '
+                             'px2ph can read from its input.points option '
+                             "(always extracted with the 'batch' engine)",
                         type=abspath)
 
     args = parser.parse_args()
-    options = get_yaml(args.config_file)
-    glyphs = px2pt(**options['input'])
+    options = get_yaml(args.config_file)['input']
+    # the points file this command may have written
+    options.pop('points', None)
 
-    if args.output is not None:
-        save_as_yaml(args.output, glyphs)
+    if args.output is not None and args.output.endswith('.npz'):
+        grid, margin = options['grid'], options.get('margin', [1, 1])
+        # only the 'batch' engine packs the points, other engines extract
+        # the same ones
+        options['engine'] = 'batch'
+        layers = list(extract_layers(**options))
+        shape = grid_shape(
+            image_shape(find_images_in_folder(options['folder'])[0]),
+            grid, margin)
+        save_points(args.output, layers, grid, margin, shape)
     else:
-        print(glyphs)
+        glyphs = px2pt(**options)
+
+        if args.output is not None:
+            save_as_yaml(args.output, glyphs)
+        else:
+            print(glyphs)
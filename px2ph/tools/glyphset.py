@@ -1,12 +1,151 @@
-from glyphNameFormatter.unicodeRangeNames import (
-    getRangeByName as get_range_by_name,
-    getSupportedRangeNames as get_supported_range_names
-)
-from glyphNameFormatter.reader import u2n, n2u
-from glyphNameFormatter.tools import (
-    charToUnicode as chr_to_unicode,
-    unicodeToChar as unicode_to_char
-)
+import json
+import pickle
+from bisect import bisect_right
+from importlib.util import find_spec
+from os import makedirs, path, replace, stat
+
+from appdirs import user_cache_dir
+
+from px2ph.utils.cache import digest
+
+
+def source_digest():
+    """
+    Returns a digest identifying the installed glyphNameFormatter without
+    importing it, so that the index is rebuilt when it is updated.
+    """
+    spec = find_spec('glyphNameFormatter')
+    if spec is None:
+        raise ImportError('No module named glyphNameFormatter, it is required '
+                          'to name the glyphs', name='glyphNameFormatter')
+    folder = path.dirname(spec.origin)
+    parts = [folder]
+    for module in ('reader.py', 'unicodeRangeNames.py'):
+        filepath = path.join(folder, module)
+        if path.exists(filepath):
+            parts.append(str(stat(filepath).st_mtime_ns))
+    return digest(*parts)[:12]
+
+
+class GlyphNameIndex:
+    """
+    On-disk index of the glyphNameFormatter data: bounds of every unicode
+    range name, and glyph names of every range stored in one file per range.
+    Files are built on first use, afterwards only the ranges a glyph set needs
+    are loaded and glyphNameFormatter isn't imported at all.
+    """
+    def __init__(self, folder=None):
+        if folder is None:
+            folder = path.join(user_cache_dir('px2ph'),
+                               'glyphset-' + source_digest())
+        self.folder = folder
+        self._ranges = None
+        self._bounds = None
+        self._starts = None
+        self._names = {}
+
+    def _write(self, filename, data):
+        makedirs(self.folder, exist_ok=True)
+        filepath = path.join(self.folder, filename)
+        with open(filepath + '.tmp', 'wb') as index_file:
+            if filename.endswith('.json'):
+                index_file.write(json.dumps(data).encode('utf-8'))
+            else:
+                pickle.dump(data, index_file, protocol=pickle.HIGHEST_PROTOCOL)
+        replace(filepath + '.tmp', filepath)
+
+    @property
+    def ranges(self):
+        """
+        Dict of the supported unicode range names and their bounds.
+        """
+        if self._ranges is None:
+            filepath = path.join(self.folder, 'ranges.json')
+            try:
+                with open(filepath, 'rb') as index_file:
+                    self._ranges = json.load(index_file)
+            except (OSError, ValueError):
+                from glyphNameFormatter.unicodeRangeNames import (
+                    getRangeByName as get_range_by_name,
+                    getSupportedRangeNames as get_supported_range_names
+                )
+                self._ranges = {name: list(get_range_by_name(name))
+                                for name in get_supported_range_names()}
+                self._write('ranges.json', self._ranges)
+            self._bounds = sorted(self._ranges.values())
+            self._starts = [bounds[0] for bounds in self._bounds]
+        return self._ranges
+
+    def get_range(self, name):
+        """
+        Returns the bounds of a unicode range name or None.
+        """
+        return self.ranges.get(name)
+
+    def _range_names(self, bounds):
+        key = tuple(bounds)
+        if key not in self._names:
+            filename = '{:04X}-{:04X}.pickle'.format(*bounds)
+            try:
+                with open(path.join(self.folder, filename), 'rb') as index_file:
+                    self._names[key] = pickle.load(index_file)
+            except (OSError, EOFError, pickle.UnpicklingError):
+                self._names[key] = names_of(bounds[0], bounds[1])
+                self._write(filename, self._names[key])
+        return self._names[key]
+
+    def names(self, start, end):
+        """
+        Yields the codepoints from start to end (inclusive) that have a glyph
+        name along with the name.
+        """
+        if self._bounds is None:
+            self.ranges
+        n = start
+        while n <= end:
+            i = bisect_right(self._starts, n) - 1
+            if i >= 0 and n <= self._bounds[i][1]:
+                stop = min(end, self._bounds[i][1])
+                names = self._range_names(self._bounds[i])
+            else:
+                # codepoints between two ranges aren't indexed
+                following = self._starts[i + 1] if i + 1 < len(self._starts) \
+                    else end + 1
+                stop = min(end, following - 1)
+                names = names_of(n, stop)
+            for m in range(n, stop + 1):
+                name = names.get(m)
+                if name is not None:
+                    yield m, name
+            n = stop + 1
+
+
+def names_of(start, end):
+    """
+    Returns a dict of the glyph names of the codepoints from start to end
+    (inclusive) as given by glyphNameFormatter.
+    """
+    from glyphNameFormatter.reader import u2n
+
+    names = {}
+    for n in range(start, end + 1):
+        name = u2n(n)
+        if name is not None:
+            names[n] = name
+    return names
+
+
+_index = None
+
+
+def get_index():
+    """
+    Returns the shared `GlyphNameIndex`.
+    """
+    global _index
+    if _index is None:
+        _index = GlyphNameIndex()
+    return _index
 
 
 def parse_range(selectors):
@@ -21,62 +160,56 @@ def parse_range(selectors):
 
     glyph_set = {}
     for selector in selectors:
-        glyph_set_part = get_range_by_name(selector)
-        if glyph_set_part is not None:
-            glyph_set_part = range_to_glyphset(glyph_set_part)
+        range_ = get_index().get_range(selector)
+        if range_ is not None:
+            range_to_glyphset(range_, glyph_set)
         else:
-            glyph_set_part = str_to_glyphset(selector)
-
-        glyph_set = {**glyph_set, **glyph_set_part}
+            str_to_glyphset(selector, glyph_set)
     return glyph_set
 
 
-def range_to_glyphset(range_):
+def range_to_glyphset(range_, glyph_set=None):
     """
     Returns a dict containing all glyphs in the given range.
     range_ must be an iterable of length 2 containing a decimal representation
     of two glyphs.
+    Glyphs are added in place to `glyph_set` if given.
     """
-    glyph_set = {}
-    for n in range(range_[0], range_[1] + 1):
-        name = u2n(n)
-        if name is not None:
-            glyph_set[n] = {
-                'chr': unicode_to_char(n),
-                'name': name,
-                'hex': hex(n)
-            }
+    if glyph_set is None:
+        glyph_set = {}
+    for n, name in get_index().names(range_[0], range_[1]):
+        glyph_set[n] = {
+            'chr': chr(n),
+            'name': name,
+            'hex': hex(n)
+        }
 
     return glyph_set
 
 
-def str_to_glyphset(str_):
+def str_to_glyphset(str_, glyph_set=None):
     """
     Returns a dict containing all glyphs present in the string.
     Range-like syntax with '-' can be used to retreive multiple glyph
     Ex: 'a-e' returns a dict with glyph informations for the series [abcde]
+    Glyphs are added in place to `glyph_set` if given.
     """
-    glyph_set = {}
+    if glyph_set is None:
+        glyph_set = {}
     escaped = False
 
     for i, chr_ in enumerate(str_):
-        n = chr_to_unicode(chr_)
+        n = ord(chr_)
         if n == 92 and not escaped: # '\'
             escaped = True
             continue
         if n == 45 and not escaped: # '-'
-            start = chr_to_unicode(str_[i-1]) + 1
-            end = chr_to_unicode(str_[i+1]) - 1
-            glyph_set = {**glyph_set, **range_to_glyphset((start, end))}
+            start = ord(str_[i-1]) + 1
+            end = ord(str_[i+1]) - 1
+            range_to_glyphset((start, end), glyph_set)
             continue
 
-        name = u2n(n)
-        if name is not None:
-            glyph_set[n] = {
-                'chr': unicode_to_char(n),
-                'name': name,
-                'hex': hex(n)
-            }
+        range_to_glyphset((n, n), glyph_set)
 
         if escaped:
             escaped = False
@@ -85,6 +218,4 @@ def str_to_glyphset(str_):
 
 
 def print_ranges():
-    names = get_supported_range_names()
-    names.sort()
-    print("\n".join(names))
+    print("\n".join(sorted(get_index().ranges)))
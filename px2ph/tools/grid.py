@@ -1,31 +1,64 @@
-from numpy import ones, uint8
-from PIL import Image
+from numpy import concatenate, full, tile, uint8
 
 
-def generate_numpy_img(grid, quantity, color, bg_color=[255, 255, 255], inner_grid=[1,1], alt_color=None):
-    """ Generate an image as a grid to draw glyphs """
-    row = grid[1] + 2
-    col = (grid[0] + 1) * quantity + 1
-    bg_color = list(reversed(bg_color))
-    color = list(reversed(color))
-    alt_color = list(reversed(alt_color)) if alt_color is not None else None
+def cell_pattern(grid, color, bg_color=[255, 255, 255], inner_grid=[1, 1],
+                 alt_color=None):
+    """
+    Returns the pixels of a glyph cell preceded by its top and left margins,
+    the pattern tiled to draw the grid.
+    """
+    pattern = full((grid[1] + 1, grid[0] + 1, 3), bg_color[::-1], uint8)
+    pattern[1:, 1:] = color[::-1]
+    if alt_color is not None:
+        pattern[1 + inner_grid[1]:grid[1] + 1 - inner_grid[1],
+                1 + inner_grid[0]:grid[0] + 1 - inner_grid[0]] = alt_color[::-1]
+    return pattern
 
-    img = ones((row, col, 3), uint8) * 255
 
-    for a in range(1, quantity * (grid[0]+1), grid[0]+1):
-        img[1:row - 1, a:a + grid[0]] = color
-        if alt_color is not None:
-            marg_y = 1 + inner_grid[1]
-            marg_x = inner_grid[0]
-            img[marg_y:row - marg_y, a + marg_x:a + grid[0] - marg_x] = alt_color
+def iter_img_rows(grid, quantity, color, bg_color=[255, 255, 255],
+                  inner_grid=[1, 1], alt_color=None, columns=None):
+    """
+    Yields the grid image (see `generate_numpy_img`) one row of glyph cells
+    at a time, preceded by its top margin, then the bottom margin row.
+    """
+    columns = columns or quantity
+    pattern = cell_pattern(grid, color, bg_color, inner_grid, alt_color)
+    height, width = pattern.shape[:2]
+    cells = tile(pattern, (1, columns, 1))
+    row = full((height, width * columns + 1, 3), bg_color[::-1], uint8)
+    row[:, :-1] = cells
+    rows = -(-quantity // columns)
+    for _ in range(rows - 1):
+        yield row
+    # unused cells of the last row are left empty
+    row = row.copy()
+    row[:, width * (quantity - columns * (rows - 1)):] = bg_color[::-1]
+    yield row
+    yield row[:1]
 
-    return img
+
+def generate_numpy_img(grid, quantity, color, bg_color=[255, 255, 255],
+                       inner_grid=[1, 1], alt_color=None, columns=None):
+    """
+    Generate an image as a grid to draw glyphs, with `columns` glyphs per row
+    if given
+    """
+    return concatenate(list(iter_img_rows(
+        grid, quantity, color, bg_color, inner_grid, alt_color, columns)))
 
 
 def generate_file(fp, options):
-    """ Generate an image as a grid to draw glyphs and save it as a png file """
-    img = Image.fromarray(generate_numpy_img(**options))
-    img.save(fp, format='png')
+    """
+    Generate an image as a grid to draw glyphs and save it as a png file,
+    written one row of glyphs at a time
+    """
+    from px2ph.utils.png import write_png
+
+    grid, quantity = options['grid'], options['quantity']
+    columns = options.get('columns') or quantity
+    rows = -(-quantity // columns)
+    write_png(fp, (grid[0] + 1) * columns + 1, (grid[1] + 1) * rows + 1,
+              iter_img_rows(**options))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,115 @@
+from fontTools.fontBuilder import FontBuilder
+from fontTools.misc.roundTools import otRound
+from fontTools.pens.cu2quPen import Cu2QuPen
+from fontTools.pens.t2CharStringPen import T2CharStringPen
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+
+
+formats = ('ttf', 'otf')
+# font info metrics, integers in binary fonts
+metrics = ('unitsPerEm', 'ascender', 'descender', 'xHeight', 'capHeight')
+
+
+def as_segment_pen(pen):
+    """
+    To be given as StrokeToShapeSegmentPen's segment_pen argument so that its
+    output pen is used as is instead of being wrapped in a SegmentToPointPen.
+    """
+    return pen
+
+
+class TTGlyphCu2QuPen(Cu2QuPen):
+    """
+    Segment pen converting cubic curves to quadratic ones into a TTGlyphPen.
+    TrueType outer contours run clockwise, unlike UFO ones, so the contours
+    direction is reversed.
+    """
+    def __init__(self, max_err):
+        self.tt_pen = TTGlyphPen(None)
+        super().__init__(self.tt_pen, max_err, reverse_direction=True)
+
+
+class BinaryFontBuilder:
+    """
+    Compiles glyphs drawn with segment pens into a TrueType ('ttf') or CFF
+    ('otf') font file with fontTools' FontBuilder, without writing a UFO.
+    """
+    def __init__(self, info, format='ttf', max_err=1.0):
+        if format not in formats:
+            raise NameError('No binary font format: ' + format)
+        self.info = info
+        self.format = format
+        self.max_err = max_err
+        self.glyph_order = ['.notdef']
+        self.cmap = {}
+        self.glyphs = {'.notdef': self._finish(self.glyph_pen())}
+        self.widths = {'.notdef': 0}
+
+    def glyph_pen(self):
+        """
+        Returns the segment pen a glyph has to be drawn with before being
+        given to `add_glyph`.
+        """
+        if self.format == 'ttf':
+            return TTGlyphCu2QuPen(self.max_err)
+        return T2CharStringPen(0, None)
+
+    def _finish(self, pen):
+        if self.format == 'ttf':
+            return pen.tt_pen.glyph()
+        return pen.getCharString()
+
+    def add_glyph(self, name, unicodes, pen, width=0):
+        self.glyph_order.append(name)
+        for unicode in unicodes:
+            self.cmap[unicode] = name
+        self.glyphs[name] = self._finish(pen)
+        self.widths[name] = width
+
+    def build(self):
+        """
+        Returns the compiled TTFont.
+        Metrics of the font info are rounded, a non integer pixel size gives
+        float ones.
+        """
+        info = {**self.info,
+                **{name: otRound(self.info[name]) for name in metrics}}
+        builder = FontBuilder(info['unitsPerEm'], isTTF=self.format == 'ttf')
+        builder.setupGlyphOrder(self.glyph_order)
+        builder.setupCharacterMap(self.cmap)
+
+        if self.format == 'ttf':
+            builder.setupGlyf(self.glyphs)
+            glyf = builder.font['glyf']
+            lsbs = {name: getattr(glyf[name], 'xMin', 0)
+                    for name in self.glyph_order}
+        else:
+            ps_name = '{}-{}'.format(info['familyName'],
+                                     info.get('styleName', 'Regular'))
+            ps_name = ps_name.replace(' ', '')
+            builder.setupCFF(ps_name, {'FullName': ps_name}, self.glyphs, {})
+            char_strings = builder.font['CFF '].cff.topDictIndex[0].CharStrings
+            lsbs = {}
+            for name in self.glyph_order:
+                bounds = char_strings[name].calcBounds(char_strings)
+                lsbs[name] = 0 if bounds is None else bounds[0]
+
+        builder.setupHorizontalMetrics(
+            {name: (self.widths[name], lsbs[name]) for name in self.glyph_order})
+        builder.setupHorizontalHeader(ascent=info['ascender'],
+                                      descent=info['descender'])
+        builder.setupNameTable({
+            'familyName': info['familyName'],
+            'styleName': info.get('styleName', 'Regular'),
+        })
+        builder.setupOS2(sTypoAscender=info['ascender'],
+                         sTypoDescender=info['descender'],
+                         usWinAscent=info['ascender'],
+                         usWinDescent=-info['descender'],
+                         sxHeight=info['xHeight'],
+                         sCapHeight=info['capHeight'])
+        builder.setupPost()
+        return builder.font
+
+    def save(self, filepath):
+        self.build().save(filepath)
@@ -0,0 +1,133 @@
+import json
+import pickle
+from hashlib import sha1
+from os import listdir, makedirs, path, remove, replace, stat, utime
+from time import time
+
+from numpy import load, save
+
+
+def digest(*parts):
+    """
+    Returns the hexadecimal sha1 digest of several bytes or str parts.
+    """
+    hash_ = sha1()
+    for part in parts:
+        hash_.update(part.encode() if isinstance(part, str) else part)
+    return hash_.hexdigest()
+
+
+class GlyphCache:
+    """
+    On-disk store of drawn glyphs keyed by a digest of their source pixels and
+    drawing options.
+    Entries older than `max_age` days are evicted, then least recently used
+    ones until the cache is smaller than `max_size` MB.
+    """
+    ext = '.pickle'
+
+    def __init__(self, folder, max_size=256, max_age=30):
+        self.folder = folder
+        self.max_size = max_size * 2**20
+        self.max_age = max_age * 24 * 3600
+        makedirs(folder, exist_ok=True)
+
+    def _path(self, key):
+        return path.join(self.folder, key + self.ext)
+
+    def __contains__(self, key):
+        return path.exists(self._path(key))
+
+    def get(self, key):
+        """
+        Returns the cached value or None.
+        """
+        filepath = self._path(key)
+        try:
+            with open(filepath, 'rb') as cache_file:
+                value = pickle.load(cache_file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        # mark the entry as recently used for the eviction
+        utime(filepath)
+        return value
+
+    def set(self, key, value):
+        filepath = self._path(key)
+        with open(filepath + '.tmp', 'wb') as cache_file:
+            pickle.dump(value, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        replace(filepath + '.tmp', filepath)
+
+    def evict(self):
+        """
+        Removes outdated entries and the least recently used ones when the
+        cache exceeds its maximum size.
+        """
+        entries = []
+        for file in listdir(self.folder):
+            if path.splitext(file)[1] != self.ext:
+                continue
+            filepath = path.join(self.folder, file)
+            file_stat = stat(filepath)
+            entries.append((file_stat.st_mtime, file_stat.st_size, filepath))
+
+        now = time()
+        size = 0
+        for mtime, file_size, filepath in sorted(entries, reverse=True):
+            size += file_size
+            if now - mtime > self.max_age or size > self.max_size:
+                remove(filepath)
+
+
+class LayerCache:
+    """
+    On-disk store of decoded layer images as .npy files named after the digest
+    of the image content, loaded memory-mapped.
+    Images are first checked by mtime and size, then by their content digest
+    so that touched but unchanged images aren't decoded again.
+    """
+    def __init__(self, folder):
+        self.folder = folder
+        makedirs(folder, exist_ok=True)
+
+    def _write_atomically(self, filepath, write):
+        with open(filepath + '.tmp', 'wb') as cache_file:
+            write(cache_file)
+        replace(filepath + '.tmp', filepath)
+
+    def get(self, filepath, decode):
+        """
+        Returns the array decoded from the image at `filepath` by `decode`,
+        read from the cache if the image didn't change.
+        """
+        filepath = path.abspath(filepath)
+        info_path = path.join(self.folder, digest(filepath) + '.json')
+        try:
+            with open(info_path, 'rb') as info_file:
+                info = json.load(info_file)
+        except (OSError, ValueError):
+            info = {}
+
+        image_stat = stat(filepath)
+        stamp = [image_stat.st_mtime_ns, image_stat.st_size]
+        if info.get('stamp') != stamp:
+            with open(filepath, 'rb') as image_file:
+                key = digest(image_file.read())
+            if info.get('hash') not in (None, key):
+                try:
+                    remove(path.join(self.folder, info['hash'] + '.npy'))
+                except OSError:
+                    pass
+            info = {'stamp': stamp, 'hash': key}
+            self._write_atomically(
+                info_path,
+                lambda info_file: info_file.write(json.dumps(info).encode()))
+
+        npy_path = path.join(self.folder, info['hash'] + '.npy')
+        try:
+            return load(npy_path, mmap_mode='r')
+        except (OSError, ValueError):
+            nparray = decode(filepath)
+            self._write_atomically(
+                npy_path, lambda npy_file: save(npy_file, nparray))
+            return nparray
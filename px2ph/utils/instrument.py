@@ -0,0 +1,88 @@
+import json
+from collections import Counter
+from contextlib import nullcontext
+from threading import Lock
+from time import perf_counter
+
+# Timed spans and counters of the build stages are only collected once
+# `enable` is called, instrumented code otherwise costs a function call and a
+# test:
+#
+#     with instrument.span('decode'):
+#         ...
+#     instrument.count('glyphs')
+
+enabled = False
+spans = {}
+counters = Counter()
+lock = Lock()
+disabled_span = nullcontext()
+
+
+class Span:
+    """
+    Adds its duration and a call to the span of the given name.
+    Spans of a same name running in several threads add their durations.
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+
+    def __exit__(self, *exc_info):
+        duration = perf_counter() - self.start
+        with lock:
+            calls, seconds = spans.get(self.name, (0, 0))
+            spans[self.name] = (calls + 1, seconds + duration)
+
+
+def enable():
+    """ Clears the collected spans and counters and starts collecting """
+    global enabled
+    enabled = True
+    spans.clear()
+    counters.clear()
+
+
+def disable():
+    """ Stops collecting, collected spans and counters are kept """
+    global enabled
+    enabled = False
+
+
+def span(name):
+    """ Returns a context manager timing the span of the given name """
+    return Span(name) if enabled else disabled_span
+
+
+def count(name, value=1):
+    if enabled:
+        with lock:
+            counters[name] += value
+
+
+def report():
+    """ Returns the collected spans and counters as a dict for json """
+    return {
+        'spans': {name: {'calls': calls, 'seconds': seconds}
+                  for name, (calls, seconds) in sorted(spans.items())},
+        'counters': dict(sorted(counters.items())),
+    }
+
+
+def merge(other):
+    """
+    Adds the spans and counters of a report, collected by another process, to
+    the collected ones.
+    """
+    with lock:
+        for name, data in other['spans'].items():
+            calls, seconds = spans.get(name, (0, 0))
+            spans[name] = (calls + data['calls'], seconds + data['seconds'])
+        counters.update(other['counters'])
+
+
+def save_report(filepath):
+    with open(filepath, 'w') as report_file:
+        json.dump(report(), report_file, indent=2)
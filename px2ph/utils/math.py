@@ -1,4 +1,13 @@
 import math
+from functools import lru_cache
+
+
+# cos and sin of right angles, exact values avoid float noise such as
+# cos(pi/2) = 6.123e-17 ending up in glyph coordinates
+right_angles = {0: (1, 0), 90: (0, 1), 180: (-1, 0), 270: (0, -1)}
+
+# distance of bezier control points approximating a quarter circle of radius 1
+kappa = (4/3) * math.tan(math.acos(0)/4)
 
 
 # point/vector operations
@@ -30,12 +39,38 @@ def move(pt, v):
 
 
 def rotate(v, theta):
-    """ Rotate vector of angle theta given in degrees"""
-    theta = math.radians(theta)
-    cos = math.cos(theta)
-    sin = math.sin(theta)
+    """
+    Rotate vector of angle theta given in degrees.
+    Right angles are computed exactly, without trigonometry.
+    """
+    theta %= 360
+    if theta == 90:
+        return (-v[1], v[0])
+    if theta == 270:
+        return (v[1], -v[0])
+    if theta == 180:
+        return (-v[0], -v[1])
+    if theta == 0:
+        return (v[0], v[1])
+    cos, sin = cos_sin(theta)
     return (cos*v[0] - sin*v[1], sin*v[0] + cos*v[1])
 
+
+@lru_cache(maxsize=256)
+def cos_sin(theta):
+    """ Returns the cos and sin of an angle given in degrees """
+    theta = math.radians(theta)
+    return (math.cos(theta), math.sin(theta))
+
+def is_straight(p0, p1, p2):
+    """
+    Returns True if p1 lies on the segment p0 -> p2, in which case going
+    through p1 doesn't change the direction.
+    """
+    v0, v1 = vector(p0, p1), vector(p1, p2)
+    return (v0[0] * v1[1] - v0[1] * v1[0] == 0
+            and v0[0] * v1[0] + v0[1] * v1[1] > 0)
+
 def roundpt(pt):
     return (round(pt[0], 1), round(pt[1], 1))
 
@@ -0,0 +1,220 @@
+from numpy import cumsum, searchsorted, unique, zeros
+
+# booleanOperations and pyclipper are only imported to union contours that
+# aren't rectilinear, see `union_contours`.
+
+
+class Contour(list):
+    """
+    Closed contour as a list of `(pt, segmentType)` tuples, drawn with a point
+    pen as booleanOperations expects.
+    """
+    def drawPoints(self, pen):
+        pen.beginPath()
+        for pt, segmentType in self:
+            pen.addPoint(pt, segmentType)
+        pen.endPath()
+
+    def bounds(self):
+        xs = [pt[0] for pt, _ in self]
+        ys = [pt[1] for pt, _ in self]
+        return min(xs), min(ys), max(xs), max(ys)
+
+    def is_polygonal(self):
+        """ Returns True if the contour is only made of lines """
+        return all(segmentType == 'line' for _, segmentType in self)
+
+    def is_rectilinear(self):
+        """
+        Returns True if the contour is only made of horizontal and vertical
+        lines, as miter/square strokes of horizontal and vertical pixel
+        lines are.
+        """
+        for i, (pt, segmentType) in enumerate(self):
+            previous = self[i - 1][0]
+            if segmentType != 'line' \
+                    or (pt[0] != previous[0] and pt[1] != previous[1]):
+                return False
+        return True
+
+
+def recorded_contours(recording):
+    """
+    Returns the contours of the pen operations recorded by a
+    RecordingPointPen.
+    """
+    contours = []
+    for method, args, kwargs in recording:
+        if method == 'beginPath':
+            contours.append(Contour())
+        elif method == 'addPoint':
+            contours[-1].append((args[0], args[1]))
+    return contours
+
+
+def overlapping_groups(contours):
+    """
+    Returns the contours grouped by overlapping, or touching, bounding boxes:
+    contours of different groups can't overlap.
+    Bounding boxes are swept along the x axis so that only the ones whose x
+    ranges overlap are compared.
+    """
+    boxes = [contour.bounds() for contour in contours]
+    parents = list(range(len(contours)))
+
+    def root(index):
+        while parents[index] != index:
+            parents[index] = parents[parents[index]]
+            index = parents[index]
+        return index
+
+    active = []
+    for index in sorted(range(len(boxes)), key=lambda index: boxes[index][0]):
+        xmin, ymin, _, ymax = boxes[index]
+        active = [other for other in active if boxes[other][2] >= xmin]
+        for other in active:
+            if boxes[other][1] <= ymax and ymin <= boxes[other][3]:
+                parents[root(index)] = root(other)
+        active.append(index)
+
+    groups = {}
+    for index, contour in enumerate(contours):
+        groups.setdefault(root(index), []).append(contour)
+    return list(groups.values())
+
+
+def union_rectilinear(contours):
+    """
+    Returns the union of rectilinear contours, with the nonzero fill rule.
+    The plane is split in cells by the contours coordinates, the winding
+    number of every cell is summed from the vertical edges to its left, then
+    the boundary of the filled cells is traced (see `trace_cells`).
+    """
+    xs = unique([pt[0] for contour in contours for pt, _ in contour])
+    ys = unique([pt[1] for contour in contours for pt, _ in contour])
+    winding = zeros((len(xs), len(ys)), int)
+    for contour in contours:
+        for i, (pt, _) in enumerate(contour):
+            previous = contour[i - 1][0]
+            if pt[0] != previous[0] or pt[1] == previous[1]:
+                continue
+            x = searchsorted(xs, pt[0])
+            y0, y1 = searchsorted(ys, (previous[1], pt[1]))
+            if y0 < y1:
+                winding[x, y0:y1] += 1
+            else:
+                winding[x, y1:y0] -= 1
+    filled = cumsum(winding, axis=0)[:-1, :-1] != 0
+    return [Contour((point, 'line') for point in contour)
+            for contour in trace_cells(filled, xs.tolist(), ys.tolist())]
+
+
+def union_polygons(contours, precision=2**16):
+    """
+    Returns the union of polygons, with the nonzero fill rule, computed by
+    pyclipper without booleanOperations' flattening and curve fitting
+    machinery, which lines don't need.
+    Coordinates are multiplied by `precision` for clipper, which works with
+    integers. As with booleanOperations, the points of the contours are kept
+    as they are, only the new ones at intersections are approximated.
+    """
+    from pyclipper import (
+        CT_UNION, PFT_NONZERO, PT_SUBJECT, ClipperException, Pyclipper
+    )
+
+    points = {}
+    clipper = Pyclipper()
+    for contour in contours:
+        path = []
+        for pt, _ in contour:
+            scaled = (round(pt[0] * precision), round(pt[1] * precision))
+            points[scaled] = pt
+            path.append(scaled)
+        try:
+            clipper.AddPath(path, PT_SUBJECT)
+        except ClipperException:
+            # contours without area are left out
+            pass
+    return [
+        Contour((points.get(tuple(scaled)) or (scaled[0] / precision,
+                                               scaled[1] / precision),
+                 'line') for scaled in path)
+        for path in clipper.Execute(CT_UNION, PFT_NONZERO, PFT_NONZERO)
+    ]
+
+
+def trace_cells(filled, xs, ys):
+    """
+    Returns the contours bounding the filled cells of a boolean array, where
+    the cell `(i, j)` spans from `(xs[i], ys[j])` to `(xs[i+1], ys[j+1])`.
+    Outer contours run counter-clockwise and holes clockwise, and only
+    corners are kept. Cells touching by a corner are bounded separately.
+    """
+    columns, rows = filled.shape
+    padded = zeros((columns + 2, rows + 2), bool)
+    padded[1:-1, 1:-1] = filled
+    # boundary edges keep the filled cells on their left, by start vertex:
+    # bottom, right, top then left sides of the cells whose neighbour is empty
+    edges = {}
+    for (dx, dy), (x0, y0, x1, y1) in (((0, -1), (0, 0, 1, 0)),
+                                       ((1, 0), (1, 0, 1, 1)),
+                                       ((0, 1), (1, 1, 0, 1)),
+                                       ((-1, 0), (0, 1, 0, 0))):
+        sides = filled & ~padded[1 + dx:columns + 1 + dx,
+                                 1 + dy:rows + 1 + dy]
+        for i, j in zip(*sides.nonzero()):
+            edges.setdefault((i + x0, j + y0), []).append((i + x1, j + y1))
+
+    contours = []
+    for start in sorted(edges):
+        while edges.get(start):
+            vertices = [start]
+            vertex = edges[start].pop()
+            while vertex != start:
+                ends = edges[vertex]
+                if len(ends) > 1:
+                    # on a corner shared by two cells, turn left to stay
+                    # around the same cell
+                    dx, dy = (vertex[0] - vertices[-1][0],
+                              vertex[1] - vertices[-1][1])
+                    left = (vertex[0] - dy, vertex[1] + dx)
+                    ends.remove(left)
+                    end = left
+                else:
+                    end = ends.pop()
+                vertices.append(vertex)
+                vertex = end
+            contours.append([
+                (xs[vertex[0]], ys[vertex[1]])
+                for i, vertex in enumerate(vertices)
+                if not is_aligned(vertices[i - 1], vertex,
+                                  vertices[(i + 1) % len(vertices)])])
+    return contours
+
+
+def is_aligned(p0, p1, p2):
+    """ Returns True if the three grid vertices are on a same line """
+    return (p0[0] == p1[0] == p2[0]) or (p0[1] == p1[1] == p2[1])
+
+
+def union_contours(contours, pen):
+    """
+    Draws the union of the contours into a point pen.
+    Contours are grouped by overlapping bounding boxes, single contours are
+    drawn as they are, groups of rectilinear contours are merged by
+    `union_rectilinear`, groups of polygons by `union_polygons` and others,
+    which have curves to fit back, by booleanOperations.
+    """
+    for group in overlapping_groups(contours):
+        if len(group) == 1:
+            group[0].drawPoints(pen)
+        elif all(contour.is_rectilinear() for contour in group):
+            for contour in union_rectilinear(group):
+                contour.drawPoints(pen)
+        elif all(contour.is_polygonal() for contour in group):
+            for contour in union_polygons(group):
+                contour.drawPoints(pen)
+        else:
+            from booleanOperations import BooleanOperationManager
+
+            BooleanOperationManager.union(group, pen)
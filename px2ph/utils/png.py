@@ -0,0 +1,130 @@
+import zlib
+from io import BytesIO
+from struct import pack, unpack
+
+from numpy import asarray, uint8, zeros
+
+# Pillow is only imported to decode images, see `iter_png_bands`, writing
+# them doesn't need it.
+
+
+signature = b'\x89PNG\r\n\x1a\n'
+# samples per pixel of every png color type
+color_type_channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}
+
+
+def png_chunk(chunk_type, data):
+    return (pack('>I', len(data)) + chunk_type + data
+            + pack('>I', zlib.crc32(chunk_type + data)))
+
+
+def read_png_header(png_file):
+    """
+    Reads the chunks of a png file up to its first IDAT chunk.
+    Returns the IHDR fields, the PLTE and tRNS chunks and the length of the
+    first IDAT chunk, or None if the file isn't a png.
+    """
+    if png_file.read(8) != signature:
+        return None
+    header, chunks = None, b''
+    while True:
+        length, chunk_type = unpack('>I4s', png_file.read(8))
+        if chunk_type == b'IDAT':
+            return header, chunks, length
+        data = png_file.read(length)
+        png_file.read(4)
+        if chunk_type == b'IHDR':
+            header = unpack('>IIBBBBB', data)
+        elif chunk_type in (b'PLTE', b'tRNS'):
+            chunks += png_chunk(chunk_type, data)
+
+
+def iter_idat(png_file, length):
+    """
+    Yields the content of the consecutive IDAT chunks in small pieces.
+    """
+    while True:
+        while length:
+            piece = png_file.read(min(length, 2**16))
+            length -= len(piece)
+            yield piece
+        png_file.read(4)
+        length, chunk_type = unpack('>I4s', png_file.read(8))
+        if chunk_type != b'IDAT':
+            return
+
+
+def iter_png_bands(filepath, band_height, mode='LA'):
+    """
+    Yields the image converted to `mode` as numpy arrays of `band_height`
+    rows (the last one can be smaller).
+    Non interlaced 8 bits png files are decoded band by band so that only the
+    pixels of one band are held in memory: the scanlines of a band are
+    inflated then decoded by Pillow as a small png, prefixed by the previous
+    band last row, which the band first row can be filtered against.
+    Other images are decoded at once.
+    """
+    from PIL import Image
+
+    with open(filepath, 'rb') as png_file:
+        header = read_png_header(png_file)
+        if header is not None:
+            (width, height, bit_depth, color_type, _, _, interlace), \
+                chunks, length = header
+        if header is None or bit_depth != 8 or interlace:
+            with Image.open(filepath) as img:
+                nparray = asarray(img.convert(mode))
+            for top in range(0, nparray.shape[0], band_height):
+                yield nparray[top:top + band_height]
+            return
+
+        row_size = 1 + width * color_type_channels[color_type]
+        idat = iter_idat(png_file, length)
+        decompressor = zlib.decompressobj()
+        scanlines = bytearray()
+        previous = b''
+        for top in range(0, height, band_height):
+            rows = min(band_height, height - top)
+            size = rows * row_size
+            while len(scanlines) < size:
+                data = decompressor.unconsumed_tail or next(idat, b'')
+                if not data:
+                    break
+                scanlines += decompressor.decompress(data,
+                                                     size - len(scanlines))
+            band = previous + bytes(scanlines[:size])
+            del scanlines[:size]
+
+            rows += 1 if previous else 0
+            ihdr = pack('>IIBBBBB', width, rows, 8, color_type, 0, 0, 0)
+            with Image.open(BytesIO(
+                    signature + png_chunk(b'IHDR', ihdr) + chunks
+                    + png_chunk(b'IDAT', zlib.compress(band, 0))
+                    + png_chunk(b'IEND', b''))) as img:
+                # last row samples, prefixed by the 'None' filter type
+                previous = b'\x00' + asarray(img)[-1].tobytes()
+                nparray = asarray(img.convert(mode))
+            yield nparray[1:] if top else nparray
+
+
+def write_png(filepath, width, height, bands, level=6):
+    """
+    Saves an 8 bits RGB png image from the numpy arrays of consecutive rows
+    yielded by `bands`, which are compressed as they come so that only one
+    band is held in memory.
+    """
+    compressor = zlib.compressobj(level)
+    with open(filepath, 'wb') as png_file:
+        png_file.write(signature + png_chunk(
+            b'IHDR', pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        data = b''
+        for band in bands:
+            # every scanline is prefixed by the 'None' filter type
+            scanlines = zeros((len(band), 1 + width * 3), uint8)
+            scanlines[:, 1:] = band.reshape(len(band), -1)
+            data += compressor.compress(scanlines.tobytes())
+            if len(data) >= 2**16:
+                png_file.write(png_chunk(b'IDAT', data))
+                data = b''
+        png_file.write(png_chunk(b'IDAT', data + compressor.flush()))
+        png_file.write(png_chunk(b'IEND', b''))
@@ -0,0 +1,41 @@
+from numpy import array, zeros
+
+from px2ph.utils.overlap import Contour, trace_cells
+
+
+def lit_pixels(contours):
+    """
+    Returns a boolean array of the pixels of the glyph contours (see
+    `nparray_to_points`), whatever their order and segment type, and the
+    position of its first pixel.
+    """
+    pixels = array([point[0] for contour in contours for point in contour])
+    origin = pixels.min(axis=0)
+    pixels -= origin
+    filled = zeros(pixels.max(axis=0) + 1, bool)
+    filled[pixels[:, 0], pixels[:, 1]] = True
+    return filled, origin
+
+
+def trace_glyph(out_pen, contours, transform):
+    """
+    Draws the outlines of the pixels of the glyph contours into a point pen,
+    instead of stroking the contours: one contour around every region of
+    connected pixels, and one around each of its holes, without overlaps and
+    with points at corners only.
+    Pixels are squares of side 1 centered on the points, moved into place by
+    the transform, which can only scale, flip and translate them.
+    """
+    filled, origin = lit_pixels(contours)
+    xs = [transform.transformPoint((x - 0.5, 0))[0]
+          for x in range(origin[0], origin[0] + filled.shape[0] + 1)]
+    ys = [transform.transformPoint((0, y - 0.5))[1]
+          for y in range(origin[1], origin[1] + filled.shape[1] + 1)]
+    # a flipped axis would reverse the contours direction
+    if xs[0] > xs[-1]:
+        xs, filled = xs[::-1], filled[::-1]
+    if ys[0] > ys[-1]:
+        ys, filled = ys[::-1], filled[:, ::-1]
+
+    for contour in trace_cells(filled, xs, ys):
+        Contour((pt, 'line') for pt in contour).drawPoints(out_pen)
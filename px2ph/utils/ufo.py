@@ -0,0 +1,101 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from os import path
+from shutil import rmtree
+from types import SimpleNamespace
+
+from fontTools.pens.recordingPen import RecordingPointPen
+from fontTools.ufoLib import DEFAULT_GLYPHS_DIRNAME, UFOWriter
+from fontTools.ufoLib.glifLib import writeGlyphToString
+
+
+# font info attributes that a defcon Font saves as empty lists by default
+default_list_info = (
+    'guidelines', 'postscriptBlueValues', 'postscriptFamilyBlues',
+    'postscriptFamilyOtherBlues', 'postscriptOtherBlues',
+    'postscriptStemSnapH', 'postscriptStemSnapV'
+)
+
+
+def font_info(data):
+    """
+    Returns a font info object, to be given to `UFOStreamWriter`, with the
+    same defaults as the info of a defcon Font.
+    """
+    return SimpleNamespace(**{
+        **{attribute: [] for attribute in default_list_info},
+        **data
+    })
+
+
+def write_glif(filepath, name, unicodes, recording):
+    """
+    Serializes recorded point pen operations of a glyph to a .glif file.
+    """
+    pen = RecordingPointPen()
+    pen.value = recording
+    data = writeGlyphToString(name, SimpleNamespace(unicodes=unicodes),
+                              pen.replay)
+    with open(filepath, 'wb') as glif_file:
+        glif_file.write(data.encode('utf-8'))
+
+
+class UFOStreamWriter:
+    """
+    Lean UFO writer that serializes glyphs as soon as they are drawn, without
+    building defcon objects, and writes the font level files once on close.
+    With `jobs` > 1, .glif files are serialized and written by a pool of
+    processes. Output is the same as a defcon Font saved at `font_path`.
+    """
+    def __init__(self, font_path, info, jobs=None):
+        if path.exists(font_path):
+            rmtree(font_path)
+        self.font_path = font_path
+        self.writer = UFOWriter(font_path)
+        self.writer.writeInfo(info)
+        self.glyph_set = self.writer.getGlyphSet()
+        self.glyph_order = []
+
+        self.executor = None
+        if jobs is not None and jobs > 1:
+            self.executor = ProcessPoolExecutor(jobs)
+            self.max_pending = jobs * 64
+            self.pending = set()
+            self.file_names = set()
+
+    def write_glyph(self, name, unicodes, draw_points):
+        """
+        Writes a glyph, draw_points is called with a point pen to draw the
+        glyph outlines.
+        """
+        self.glyph_order.append(name)
+        if self.executor is None:
+            self.glyph_set.writeGlyph(name, SimpleNamespace(unicodes=unicodes),
+                                      draw_points)
+            return
+
+        pen = RecordingPointPen()
+        draw_points(pen)
+        # file names are given in order so they are the same as serially
+        file_name = self.glyph_set.glyphNameToFileName(name, self.file_names)
+        self.file_names.add(file_name.lower())
+        self.glyph_set.contents[name] = file_name
+
+        if len(self.pending) >= self.max_pending:
+            done, self.pending = wait(self.pending,
+                                      return_when=FIRST_COMPLETED)
+            for future in done:
+                future.result()
+        self.pending.add(self.executor.submit(
+            write_glif,
+            path.join(self.font_path, DEFAULT_GLYPHS_DIRNAME, file_name),
+            name, unicodes, pen.value))
+
+    def close(self):
+        if self.executor is not None:
+            for future in self.pending:
+                future.result()
+            self.executor.shutdown()
+        self.glyph_set.writeContents()
+        self.writer.writeLayerContents()
+        self.writer.writeLib({'public.glyphOrder': self.glyph_order})
+        self.writer.close()
@@ -0,0 +1,234 @@
+from functools import partial
+from os import path
+
+from fontTools.cu2qu import curves_to_quadratic
+from fontTools.designspaceLib import (
+    AxisDescriptor, DesignSpaceDocument, InstanceDescriptor, SourceDescriptor
+)
+from fontTools.pens.pointPen import SegmentToPointPen
+from fontTools.pens.recordingPen import RecordingPen
+
+from px2ph.px2ph import (
+    input_chunks, iter_drawings, new_font, replay_recording
+)
+from px2ph.utils import instrument
+
+# Masters of a variable font are the glyphs stroked at several stroke widths,
+# given in the output config along with the axis they lie on:
+#
+#     output:
+#       masters:
+#         - {name: Light, strokeWidth: 60, location: 300}
+#         - {name: Regular, strokeWidth: 100, location: 400}
+#         - {name: Black, strokeWidth: 160, location: 900}
+#       axis: {tag: wght, name: Weight, default: 400}
+
+# axis of the masters, its default location is the first master one
+default_axis = {'tag': 'wght', 'name': 'Weight'}
+# variable font formats besides UFO masters and a designspace
+formats = ('ttf',)
+# bevel and round joins are drawn with a number of points depending on the
+# stroke width, so masters can only be compatible with miter joins, unless
+# the glyphs are traced
+linejoins = ('miter',)
+
+
+def master_outlines(input, glyph_set, draw, vectorize, masters,
+                    chunk_size=256, jobs=None):
+    """
+    Returns for every master the recorded segment pen operations of every
+    glyph stroked at the master `strokeWidth` with the `vectorize` options
+    (see `draw_glyph`). Points are extracted once (see
+    `input_chunks`) then stroked for each master (see `iter_drawings`).
+    Closing lines are explicit, otherwise they are drawn only where the last
+    point of a contour overlaps the previous one, so compatible outlines
+    wouldn't always have the same segments.
+    """
+    chunks = list(input_chunks(input, glyph_set, chunk_size))
+    vectorize = {**vectorize, 'outputImpliedClosingLine': True}
+    outlines = []
+    for master in masters:
+        master_draw = partial(draw, stroke_width=master['strokeWidth'],
+                              vectorize=vectorize)
+        recordings = []
+        for draw_segments in iter_drawings(chunks, master_draw, jobs,
+                                           segment=True):
+            pen = RecordingPen()
+            draw_segments(pen)
+            recordings.append(pen.value)
+        outlines.append(recordings)
+    return outlines
+
+
+def check_compatibility(name, outlines):
+    """
+    Raises a ValueError unless the outlines of a glyph in every master (see
+    `master_outlines`) have the same segments and can be interpolated.
+    """
+    structures = {tuple((operator, len(operands))
+                        for operator, operands in outline)
+                  for outline in outlines}
+    if len(structures) > 1:
+        raise ValueError('Incompatible masters outlines for glyph: ' + name)
+
+
+def compatible_quadratic(outlines, max_err):
+    """
+    Returns the compatible outlines of a glyph in every master with their
+    cubic curves converted to quadratic ones of the same number of points in
+    every master.
+    """
+    quadratic = [[] for outline in outlines]
+    currents = [None] * len(outlines)
+    for operations in zip(*outlines):
+        if operations[0][0] == 'curveTo':
+            curves = [(current, *operands)
+                      for current, (_, operands) in zip(currents, operations)]
+            splines = curves_to_quadratic(curves, [max_err] * len(curves))
+            for outline, spline in zip(quadratic, splines):
+                outline.append(('qCurveTo', tuple(spline[1:])))
+        else:
+            for outline, operation in zip(quadratic, operations):
+                outline.append(operation)
+        if operations[0][1]:
+            currents = [operands[-1] for _, operands in operations]
+    return quadratic
+
+
+def masters_document(info, masters, axis_options):
+    """
+    Returns a DesignSpaceDocument with the axis, a source and an instance for
+    every master. Sources paths or fonts are left to the caller.
+    """
+    axis_options = {**default_axis, **axis_options}
+    locations = [master['location'] for master in masters]
+    axis = AxisDescriptor()
+    axis.tag, axis.name = axis_options['tag'], axis_options['name']
+    axis.minimum, axis.maximum = min(locations), max(locations)
+    axis.default = axis_options.get('default', locations[0])
+    if axis.default not in locations:
+        raise ValueError('No master at the default axis location: '
+                         + str(axis.default))
+
+    document = DesignSpaceDocument()
+    document.addAxis(axis)
+    for master in masters:
+        location = {axis.name: master['location']}
+        source = SourceDescriptor()
+        source.name = master['name']
+        source.familyName = info['familyName']
+        source.styleName = master['name']
+        source.location = location
+        source.copyInfo = master['location'] == axis.default
+        document.addSource(source)
+
+        instance = InstanceDescriptor()
+        instance.familyName = info['familyName']
+        instance.styleName = master['name']
+        instance.location = location
+        document.addInstance(instance)
+    return document
+
+
+def variable_font(info, font_path, input, glyph_set, draw, output, jobs=None):
+    """
+    Builds the masters of the `masters` output option from a single
+    extraction of the points, after checking they are compatible: saved as
+    UFOs next to a designspace document, or compiled into a variable 'ttf'
+    font file with fontTools' varLib if `format` is 'ttf'. Stroked glyphs
+    need one of the `linejoins`.
+    Glyphs are stroked by `jobs` processes (see `iter_drawings`).
+    """
+    masters = output['masters']
+    format = output.get('format', 'ufo')
+    if format != 'ufo' and format not in formats:
+        raise NameError('No variable font format: ' + format)
+    vectorize = output['vectorize']
+    linejoin = vectorize.get('linejoin', 'miter')
+    if vectorize.get('engine') != 'trace' and linejoin not in linejoins:
+        raise ValueError('No compatible masters with the linejoin: '
+                         + linejoin)
+
+    outlines = master_outlines(input, glyph_set, draw, vectorize, masters,
+                               output.get('chunkSize') or 256, jobs)
+    glyphs = [(glyph_repr, glyph_set[glyph_repr]['name'])
+              for glyph_repr in glyph_set]
+    for (_, name), glyph_outlines in zip(glyphs, zip(*outlines)):
+        check_compatibility(name, glyph_outlines)
+
+    document = masters_document(info, masters, output.get('axis', {}))
+    base_path = path.splitext(font_path)[0]
+    if format == 'ttf':
+        return compile_variable_font(
+            info, output.get('file') or base_path + '.ttf', document, glyphs,
+            outlines)
+
+    for source, source_outlines in zip(document.sources, outlines):
+        source.path = '{}-{}.ufo'.format(base_path, source.styleName)
+        source.filename = path.basename(source.path)
+        write_master(source.path, {**info, 'styleName': source.styleName},
+                     glyphs, source_outlines, output)
+    with instrument.span('save'):
+        document.write(base_path + '.designspace')
+
+
+def write_master(font_path, info, glyphs, outlines, output):
+    """
+    Saves the outlines of a master as a UFO, with a `UFOStreamWriter` if the
+    `writer` output option is 'ufoLib' (see `write_font`), otherwise with a
+    defcon Font.
+    """
+    if output.get('writer') == 'ufoLib':
+        from px2ph.utils.ufo import UFOStreamWriter, font_info
+
+        writer = UFOStreamWriter(font_path, font_info(info),
+                                 output.get('writerJobs'))
+        for (glyph_repr, name), outline in zip(glyphs, outlines):
+            writer.write_glyph(name, [glyph_repr], partial(
+                replay_points, outline))
+        with instrument.span('save'):
+            writer.close()
+        return
+
+    font = new_font(info)
+    for (glyph_repr, name), outline in zip(glyphs, outlines):
+        glyph = font.newGlyph(name)
+        glyph.unicodes = [glyph_repr]
+        replay_points(outline, glyph.getPointPen())
+    with instrument.span('save'):
+        font.save(path=font_path)
+
+
+def replay_points(outline, pen):
+    """
+    Replays a recorded segment pen outline into a point pen.
+    """
+    replay_recording(outline, SegmentToPointPen(pen), segment=True)
+
+
+def compile_variable_font(info, font_path, document, glyphs, outlines):
+    """
+    Compiles the masters outlines into a variable TrueType font file, their
+    curves converted to compatible quadratic ones (see
+    `compatible_quadratic`).
+    """
+    from fontTools.varLib import build
+
+    from px2ph.utils.binary import BinaryFontBuilder
+
+    builders = [BinaryFontBuilder({**info, 'styleName': source.styleName})
+                for source in document.sources]
+    max_err = builders[0].max_err
+    for (glyph_repr, name), glyph_outlines in zip(glyphs, zip(*outlines)):
+        for builder, outline in zip(
+                builders, compatible_quadratic(glyph_outlines, max_err)):
+            pen = builder.glyph_pen()
+            replay_recording(outline, pen, segment=True)
+            builder.add_glyph(name, [glyph_repr], pen)
+    for source, builder in zip(document.sources, builders):
+        source.font = builder.build()
+
+    with instrument.span('varLib'):
+        font, _, _ = build(document)
+    with instrument.span('save'):
+        font.save(font_path)
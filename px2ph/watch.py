@@ -0,0 +1,164 @@
+import json
+from functools import partial
+from os import path, stat
+from time import perf_counter, sleep
+from types import SimpleNamespace
+
+from fontTools.misc import plistlib
+from fontTools.ufoLib import DEFAULT_GLYPHS_DIRNAME, LIB_FILENAME
+from fontTools.ufoLib.glifLib import GlyphSet
+
+from px2ph.px2ph import (
+    cell_contours, font_setup, glyph_digest, hashes_lib_key, px2font
+)
+from px2ph.px2pt import find_images_in_folder, get_image_as_nparray, sheet_view
+from px2ph.utils.yaml import get_yaml
+
+
+class FontWatcher:
+    """
+    Keeps the config, glyph set and decoded layers of a build in memory so
+    that, when a layer is modified, only the glyphs whose cells pixels changed
+    are redrawn and their .glif files rewritten, along with the font lib
+    holding their digest.
+    The `points` input option is ignored. A modified config, added, removed
+    or resized layers, binary outputs and masters trigger an incremental
+    build of the whole font (see `update_font`).
+    """
+    def __init__(self, config_file, jobs=None):
+        self.config_file = config_file
+        self.jobs = jobs
+        self.load()
+
+    def load(self):
+        """
+        Reads the config and the layers then builds the font.
+        """
+        self.config_mtime = stat(self.config_file).st_mtime_ns
+        self.config = get_yaml(self.config_file)
+        # the watched layers are the source of the glyphs, not the points
+        # px2pt may have extracted from them
+        self.config['input'].pop('points', None)
+        # whole font builds are incremental and have no 'ufoLib' writer,
+        # modified glyphs are written with ufoLib anyway
+        if not self.config['output'].get('masters'):
+            self.config['output'].pop('writer', None)
+            self.config['output'].pop('writerJobs', None)
+        input, output = self.config['input'], self.config['output']
+        self.grid = input['grid']
+        self.margin = input.get('margin', [1, 1])
+        self.layers = {}
+        for layer_path in find_images_in_folder(input['folder']):
+            self.layers[layer_path] = (
+                stat(layer_path).st_mtime_ns,
+                get_image_as_nparray(layer_path, input.get('cache')))
+
+        px2font(**self.config, cache=True, jobs=self.jobs)
+
+        self.ufo_glyphs = None
+        if output.get('format', 'ufo') == 'ufo' and not output.get('masters'):
+            glyph_set, _, self.draw, draw_options = font_setup(**self.config)
+            self.draw_options = json.dumps(draw_options, sort_keys=True)
+            self.glyphs = [(glyph_repr, glyph_set[glyph_repr]['name'])
+                           for glyph_repr in glyph_set]
+
+            font_path = path.abspath(output['folder'])
+            self.ufo_glyphs = GlyphSet(
+                path.join(font_path, DEFAULT_GLYPHS_DIRNAME))
+            self.lib_path = path.join(font_path, LIB_FILENAME)
+            with open(self.lib_path, 'rb') as lib_file:
+                self.lib = plistlib.load(lib_file)
+
+    def poll(self):
+        """
+        Checks the config and layers for modifications and rebuilds what is
+        needed. Returns the number of redrawn glyphs, None if nothing changed
+        or 'all' if the whole font was rebuilt.
+        """
+        if stat(self.config_file).st_mtime_ns != self.config_mtime:
+            self.load()
+            return 'all'
+
+        layers_paths = find_images_in_folder(self.config['input']['folder'])
+        if layers_paths != list(self.layers):
+            self.load()
+            return 'all'
+
+        # the new layers are only kept once their glyphs are rebuilt, so a
+        # failed rebuild is tried again on next poll
+        layers = dict(self.layers)
+        changed = None
+        for layer_path in layers_paths:
+            mtime, previous = layers[layer_path]
+            if stat(layer_path).st_mtime_ns == mtime:
+                continue
+            mtime = stat(layer_path).st_mtime_ns
+            try:
+                nparray = get_image_as_nparray(
+                    layer_path, self.config['input'].get('cache'))
+            except OSError:
+                # the file is being written, it is read again on next poll
+                continue
+            layers[layer_path] = (mtime, nparray)
+            if self.ufo_glyphs is None or nparray.shape != previous.shape:
+                self.load()
+                return 'all'
+
+            cells = sheet_view(nparray, self.grid, self.margin) \
+                != sheet_view(previous, self.grid, self.margin)
+            cells = cells.reshape(len(cells), -1).any(axis=1)
+            changed = cells if changed is None else changed | cells
+
+        if changed is None:
+            return None
+        # unused cells of the last row of glyphs aren't part of the font
+        indices = changed[:len(self.glyphs)].nonzero()[0].tolist()
+        if indices:
+            self.rebuild(indices, layers)
+        self.layers = layers
+        return len(indices)
+
+    def rebuild(self, indices, layers):
+        """
+        Redraws the glyphs at the given indices of the glyph set from the
+        given layers and saves them along with their digest.
+        Glyph names don't change so the UFO contents are left as they are.
+        """
+        views = [sheet_view(nparray, self.grid, self.margin)
+                 for _, nparray in layers.values()]
+        hashes = self.lib[hashes_lib_key]
+        for index in indices:
+            glyph_repr, name = self.glyphs[index]
+            contours = cell_contours(views, index, self.grid)
+            self.ufo_glyphs.writeGlyph(
+                name, SimpleNamespace(unicodes=[glyph_repr]),
+                partial(self.draw, contours=contours))
+            hashes[name] = glyph_digest(
+                self.draw_options, name, glyph_repr,
+                [view[index].tobytes() for view in views])
+        with open(self.lib_path, 'wb') as lib_file:
+            plistlib.dump(self.lib, lib_file)
+
+
+def watch(config_file, interval=0.1, jobs=None):
+    """
+    Builds the font then polls its config and layers every `interval`
+    seconds to rebuild it on modification, until interrupted.
+    """
+    watcher = FontWatcher(config_file, jobs)
+    print('watching', watcher.config['input']['folder'])
+    try:
+        while True:
+            start = perf_counter()
+            try:
+                rebuilt = watcher.poll()
+            except Exception as error:
+                # keep watching, the files are probably being edited
+                print('build failed:', repr(error))
+                rebuilt = None
+            if rebuilt is not None:
+                print('{} glyph(s) rebuilt in {:.0f}ms'.format(
+                    rebuilt, (perf_counter() - start) * 1000))
+            sleep(interval)
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,91 @@
+"""
+Counts the memory blocks allocated by draw_glyph to stroke a long contour,
+traced with tracemalloc when the outline reaches the output pen (when the
+stroke pen holds all its points), and times drawing a synthetic font.
+
+    python3 -m tests.benchmarks.allocations
+"""
+import tracemalloc
+from time import perf_counter
+
+from fontTools.misc.transform import Transform
+from fontTools.pens.recordingPen import RecordingPointPen
+
+from px2ph.px2ph import draw_glyph
+from tests.fixtures import synthetic_glyphs
+
+options = {
+    'miter/square': {'linecap': 'square', 'linejoin': 'miter'},
+    'round/round': {'linecap': 'round', 'linejoin': 'round'},
+    'array round/round': {'linecap': 'round', 'linejoin': 'round',
+                          'engine': 'array'},
+}
+
+
+class SnapshotPen:
+    """
+    Point pen taking a tracemalloc snapshot at its first point, if tracing.
+    """
+    snapshot = None
+
+    def beginPath(self, identifier=None, **kwargs):
+        pass
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None, **kwargs):
+        if self.snapshot is None and tracemalloc.is_tracing():
+            self.snapshot = tracemalloc.take_snapshot()
+
+    def endPath(self):
+        pass
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None,
+                     **kwargs):
+        pass
+
+
+def zigzag(length):
+    return [((i, i % 2), 'move' if i == 0 else 'line') for i in range(length)]
+
+
+def outline_blocks(vectorize, length=1000):
+    """
+    Returns the count and size of the blocks allocated while stroking an open
+    contour of the given length and still alive when its outline is drawn.
+    """
+    contours = [zigzag(length)]
+    transform = Transform(100, 0, 0, 100, 0, 0)
+    # fills the caches of joins and caps first
+    draw_glyph(SnapshotPen(), contours, transform, 100, vectorize)
+    pen = SnapshotPen()
+    tracemalloc.start()
+    draw_glyph(pen, contours, transform, 100, vectorize)
+    tracemalloc.stop()
+    statistics = pen.snapshot.filter_traces(
+        [tracemalloc.Filter(False, tracemalloc.__file__)]
+    ).statistics('filename')
+    return (sum(stat.count for stat in statistics),
+            sum(stat.size for stat in statistics))
+
+
+def draw_font(glyphs, vectorize):
+    transform = Transform()
+    start = perf_counter()
+    for contours in glyphs:
+        draw_glyph(RecordingPointPen(), contours, transform, 100, vectorize)
+    return perf_counter() - start
+
+
+def bench_allocations(length=1000, quantity=2000):
+    glyphs = synthetic_glyphs(quantity)
+    return {name: (outline_blocks(vectorize, length),
+                   min(draw_font(glyphs, vectorize) for _ in range(3)))
+            for name, vectorize in options.items()}
+
+
+if __name__ == '__main__':
+    length = 1000
+    for name, ((blocks, size), duration) in bench_allocations(length).items():
+        print('{:>17}: {} blocks ({:.1f} per point, {:.1f}KB) alive when '
+              'drawing the outline, font drawn in {:.3f}s'.format(
+                  name, blocks, blocks / length, size / 1024, duration))
@@ -0,0 +1,42 @@
+"""
+Compares the time and peak memory of extracting the points of a multi-row
+layer decoded at once and decoded one row of glyphs at a time.
+
+    python3 -m tests.benchmarks.bands
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from resource import getrusage, RUSAGE_SELF
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from tests.fixtures import generate_layers
+
+
+def run_extract(layer_path, grid, bands):
+    from px2ph.px2pt import extract_layer
+
+    start = perf_counter()
+    extract_layer(layer_path, grid, bands=bands)
+    # ru_maxrss is given in kilobytes on linux
+    return perf_counter() - start, getrusage(RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(*args):
+    """ Runs extract_layer in a fresh process, returns its duration and peak RSS """
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_extract, *args).result()
+
+
+def bench_bands(quantity=100000, columns=1000, grid=[5, 9], density=0.1):
+    with TemporaryDirectory() as folder:
+        layer_path = generate_layers(folder, quantity, grid, density=density,
+                                     columns=columns)[0]
+        return {bands: measure(layer_path, grid, bands)
+                for bands in (False, True)}
+
+
+if __name__ == '__main__':
+    for bands, (duration, rss) in bench_bands().items():
+        print('{:>10}: {:.2f}s, peak RSS {:.1f} MB'.format(
+            'bands' if bands else 'whole', duration, rss))
@@ -0,0 +1,52 @@
+"""
+Compares building a ttf/otf font straight from the pixels with writing a UFO
+then compiling it with ufo2ft.
+
+    python3 -m tests.benchmarks.binary
+"""
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.px2ph import px2font
+from tests.fixtures import font_options, generate_layers
+
+
+def compile_ufo(ufo_path, font_path, format):
+    from defcon import Font
+    from ufo2ft import compileOTF, compileTTF
+
+    compiler = compileTTF if format == 'ttf' else compileOTF
+    compiler(Font(ufo_path), removeOverlaps=False).save(font_path)
+
+
+def bench_binary(quantity=5000, grid=[5, 9], layers=4):
+    results = {}
+    with TemporaryDirectory() as folder:
+        layers_folder = path.join(folder, 'layers')
+        makedirs(layers_folder)
+        generate_layers(layers_folder, quantity, grid, layers)
+        for format in ('ttf', 'otf'):
+            options = font_options(layers_folder, path.join(folder, 'out.ufo'),
+                                   quantity, grid)
+            options['output']['writer'] = 'ufoLib'
+            start = perf_counter()
+            px2font(**options)
+            ufo = perf_counter() - start
+            compile_ufo(path.join(folder, 'out.ufo'),
+                        path.join(folder, 'ufo.' + format), format)
+            ufo_compile = perf_counter() - start
+
+            options = font_options(layers_folder, path.join(folder, 'out.ufo'),
+                                   quantity, grid)
+            options['output']['format'] = format
+            start = perf_counter()
+            px2font(**options)
+            results[format] = (ufo, ufo_compile, perf_counter() - start)
+    return results
+
+
+if __name__ == '__main__':
+    for format, (ufo, ufo_compile, direct) in bench_binary().items():
+        print('{}: UFO {:.2f}s + compile = {:.2f}s, direct {:.2f}s'.format(
+            format, ufo, ufo_compile, direct))
@@ -0,0 +1,36 @@
+"""
+Compares glyph set resolution time with a cold glyph name index (built from
+glyphNameFormatter) and a warm one (read from disk as in a new process).
+
+    python3 -m tests.benchmarks.glyphset
+"""
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.tools import glyphset
+from px2ph.tools.glyphset import GlyphNameIndex, parse_range
+
+selectors = [
+    'Basic Latin', 'Latin-1 Supplement', 'Latin Extended-A',
+    'Latin Extended-B', 'Greek and Coptic', 'Cyrillic', 'Hebrew', 'Arabic',
+    'Hiragana', 'Katakana', 'Hangul Jamo', 'CJK Unified Ideographs',
+]
+
+
+def bench_glyphset(selectors=selectors, repeat=3):
+    with TemporaryDirectory() as folder:
+        timings = []
+        for n in range(repeat + 1):
+            # a new index only shares the files with the previous runs
+            glyphset._index = GlyphNameIndex(folder)
+            start = perf_counter()
+            glyph_set = parse_range(selectors)
+            timings.append(perf_counter() - start)
+    glyphset._index = None
+    return len(glyph_set), timings[0], min(timings[1:])
+
+
+if __name__ == '__main__':
+    quantity, cold, warm = bench_glyphset()
+    print('{} glyphs: cold index {:.3f}s, warm index {:.3f}s (x{:.1f})'.format(
+        quantity, cold, warm, cold / warm))
@@ -0,0 +1,92 @@
+"""
+Compares the time of generating a grid template with one slice assignment per
+cell and with a tiled cell pattern, and the time and peak memory of saving it
+with Pillow and streamed one row of glyphs at a time.
+
+    python3 -m tests.benchmarks.grid
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from os import path
+from resource import getrusage, RUSAGE_SELF
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from numpy import ones, uint8
+
+from px2ph.tools.grid import generate_file, generate_numpy_img
+
+options = {'grid': [5, 9], 'quantity': 50000, 'inner_grid': [1, 2],
+           'color': [255, 0, 0], 'alt_color': [255, 50, 50]}
+
+
+def generate_numpy_img_loop(grid, quantity, color, bg_color=[255, 255, 255],
+                            inner_grid=[1, 1], alt_color=None):
+    """ Previous implementation, filling the cells one by one """
+    row = grid[1] + 2
+    col = (grid[0] + 1) * quantity + 1
+    color = list(reversed(color))
+    alt_color = list(reversed(alt_color)) if alt_color is not None else None
+
+    img = ones((row, col, 3), uint8) * 255
+
+    for a in range(1, quantity * (grid[0]+1), grid[0]+1):
+        img[1:row - 1, a:a + grid[0]] = color
+        if alt_color is not None:
+            marg_y = 1 + inner_grid[1]
+            marg_x = inner_grid[0]
+            img[marg_y:row - marg_y, a + marg_x:a + grid[0] - marg_x] = alt_color
+
+    return img
+
+
+def save_with_pillow(fp, options):
+    from PIL import Image
+
+    Image.fromarray(generate_numpy_img(**options)).save(fp, format='png')
+
+
+def run_save(save, fp, options):
+    start = perf_counter()
+    save(fp, options)
+    # ru_maxrss is given in kilobytes on linux
+    return perf_counter() - start, getrusage(RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure_save(*args):
+    """ Saves the grid in a fresh process, returns its duration and peak RSS """
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_save, *args).result()
+
+
+def timed(function, *args, **kwargs):
+    start = perf_counter()
+    function(*args, **kwargs)
+    return perf_counter() - start
+
+
+def bench_grid(options=options, rows_quantity=500000, columns=1000, repeat=3):
+    results = {
+        'loop': min(timed(generate_numpy_img_loop, **options)
+                    for _ in range(repeat)),
+        'tiled': min(timed(generate_numpy_img, **options)
+                     for _ in range(repeat)),
+    }
+    with TemporaryDirectory() as folder:
+        fp = path.join(folder, 'grid.png')
+        for name, layout in (('row', options),
+                             ('rows', dict(options, quantity=rows_quantity,
+                                           columns=columns))):
+            results['pillow, ' + name] = measure_save(save_with_pillow, fp,
+                                                      layout)
+            results['streamed, ' + name] = measure_save(generate_file, fp,
+                                                        layout)
+    return results
+
+
+if __name__ == '__main__':
+    for name, result in bench_grid().items():
+        if isinstance(result, tuple):
+            print('{:>15}: {:.3f}s, peak RSS {:.1f} MB'.format(name, *result))
+        else:
+            print('{:>15}: {:.3f}s'.format(name, result))
@@ -0,0 +1,49 @@
+"""
+Measures px2font rebuild time after a one pixel edit with the glyph cache.
+
+    python3 -m tests.benchmarks.incremental
+"""
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from numpy import array
+from PIL import Image
+
+from px2ph.px2ph import px2font
+from tests.fixtures import font_options, generate_layers
+
+
+def timed_px2font(options, cache):
+    # px2font consumes some of its options
+    options = {key: dict(value) for key, value in options.items()}
+    start = perf_counter()
+    px2font(**options, cache=cache)
+    return perf_counter() - start
+
+
+def bench_incremental(quantity=3000, grid=[5, 9], layers=4):
+    with TemporaryDirectory() as folder:
+        layers_folder = path.join(folder, 'layers')
+        output = path.join(folder, 'out.ufo')
+        makedirs(layers_folder)
+        layers_paths = generate_layers(layers_folder, quantity, grid, layers)
+        options = font_options(layers_folder, output, quantity, grid)
+
+        results = {'no cache': timed_px2font(options, False)}
+        results['cold cache'] = timed_px2font(options, True)
+        results['unchanged'] = timed_px2font(options, True)
+
+        # toggles one pixel of the middle glyph in the first layer
+        with Image.open(layers_paths[0]) as img:
+            nparray = array(img)
+        x = (grid[0] + 1) * (quantity // 2) + 1
+        nparray[1, x, 1] = 255 - nparray[1, x, 1]
+        Image.fromarray(nparray, 'LA').save(layers_paths[0], format='png')
+        results['one glyph edit'] = timed_px2font(options, True)
+    return results
+
+
+if __name__ == '__main__':
+    for name, duration in bench_incremental().items():
+        print('{:>15}: {:.3f}s'.format(name, duration))
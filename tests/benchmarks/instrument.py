@@ -0,0 +1,64 @@
+"""
+Measures the cost of the build instrumentation: px2font with and without
+spans and counters collected, and the estimated share of the disabled spans
+and counters in a build, from their cost per call.
+
+    python3 -m tests.benchmarks.instrument
+"""
+from os import makedirs, path
+from shutil import rmtree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.px2ph import px2font
+from px2ph.utils import instrument
+from tests.fixtures import font_options, generate_layers
+
+
+def disabled_cost(calls=10**6):
+    """ Returns the seconds per call of a disabled span and counter """
+    instrument.disable()
+    start = perf_counter()
+    for _ in range(calls):
+        with instrument.span('stroke'):
+            pass
+        instrument.count('glyphs')
+    return (perf_counter() - start) / calls
+
+
+def build(options, enabled):
+    rmtree(options['output']['folder'], ignore_errors=True)
+    if enabled:
+        instrument.enable()
+    else:
+        instrument.disable()
+    start = perf_counter()
+    px2font(**options)
+    return perf_counter() - start
+
+
+def bench_instrument(quantity=2000, grid=[5, 9], layers=4, repeat=3):
+    with TemporaryDirectory() as folder:
+        layers_folder = path.join(folder, 'layers')
+        makedirs(layers_folder)
+        generate_layers(layers_folder, quantity, grid, layers)
+        options = font_options(layers_folder, path.join(folder, 'out.ufo'),
+                               quantity, grid)
+        disabled = min(build(options, False) for _ in range(repeat))
+        enabled = min(build(options, True) for _ in range(repeat))
+        report = instrument.report()
+    calls = sum(span['calls'] for span in report['spans'].values())
+    return disabled, enabled, calls * disabled_cost(), report
+
+
+if __name__ == '__main__':
+    disabled, enabled, cost, report = bench_instrument()
+    print('px2font {:.3f}s, instrumented {:.3f}s (+{:.1%}), disabled '
+          'instrumentation cost {:.2f}ms ({:.3%})'.format(
+              disabled, enabled, enabled / disabled - 1, cost * 1000,
+              cost / disabled))
+    for name, span in report['spans'].items():
+        print('{:>13}: {:.3f}s in {} calls'.format(name, span['seconds'],
+                                                  span['calls']))
+    for name, value in report['counters'].items():
+        print('{:>13}: {}'.format(name, value))
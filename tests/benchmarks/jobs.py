@@ -0,0 +1,43 @@
+"""
+Compares px2font build time for several stroking process counts and checks
+the written UFOs are identical to the serial one.
+
+    python3 -m tests.benchmarks.jobs
+"""
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.px2ph import px2font
+from tests.fixtures import font_options, generate_layers, read_tree
+
+
+def bench_jobs(quantity=4000, grid=[5, 9], layers=4, jobs=(1, 2, 4),
+               linejoin='round'):
+    results = {}
+    with TemporaryDirectory() as folder:
+        layers_folder = path.join(folder, 'layers')
+        makedirs(layers_folder)
+        generate_layers(layers_folder, quantity, grid, layers)
+        reference = None
+        for count in jobs:
+            options = font_options(layers_folder,
+                                   path.join(folder, 'font.ufo'),
+                                   quantity, grid, linejoin=linejoin)
+            options['output']['writer'] = 'ufoLib'
+            start = perf_counter()
+            px2font(**options, jobs=count)
+            timing = perf_counter() - start
+            tree = read_tree(options['output']['folder'])
+            if reference is None:
+                reference = tree
+            results[count] = (timing, tree == reference)
+    return results
+
+
+if __name__ == '__main__':
+    results = bench_jobs()
+    serial = results[1][0]
+    for count, (timing, identical) in results.items():
+        print('{} job(s): {:.2f}s (x{:.2f}), identical: {}'.format(
+            count, timing, serial / timing, identical))
@@ -0,0 +1,46 @@
+"""
+Compares layer decoding time without cache, with a cold layer cache (images
+decoded then stored) and with a warm one (arrays read memory-mapped), and the
+resulting px2pt time.
+
+    python3 -m tests.benchmarks.layer_cache
+"""
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.px2pt import px2pt, read_layers
+from tests.fixtures import generate_layers
+
+
+def timed(function, *args, **kwargs):
+    start = perf_counter()
+    function(*args, **kwargs)
+    return perf_counter() - start
+
+
+def bench_layer_cache(quantity=5000, grid=[5, 38], layers=8, repeat=3):
+    with TemporaryDirectory() as folder:
+        layers_folder = path.join(folder, 'layers')
+        cache = path.join(folder, 'cache')
+        makedirs(layers_folder)
+        generate_layers(layers_folder, quantity, grid, layers)
+
+        results = {
+            'no cache': min(timed(read_layers, layers_folder)
+                            for _ in range(repeat)),
+            'cold cache': timed(read_layers, layers_folder, cache),
+            'warm cache': min(timed(read_layers, layers_folder, cache)
+                              for _ in range(repeat)),
+            'px2pt, no cache': min(timed(px2pt, layers_folder, grid)
+                                   for _ in range(repeat)),
+            'px2pt, warm cache': min(timed(px2pt, layers_folder, grid,
+                                           cache=cache)
+                                     for _ in range(repeat)),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    for name, duration in bench_layer_cache().items():
+        print('{:>17}: {:.3f}s'.format(name, duration))
@@ -0,0 +1,48 @@
+"""
+Compares px2font peak memory with and without the streaming pipeline.
+
+    python3 -m tests.benchmarks.memory
+"""
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from os import path
+from resource import getrusage, RUSAGE_SELF
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from tests.fixtures import font_options, generate_layers
+
+
+def run_px2font(options):
+    from px2ph.px2ph import px2font
+
+    start = perf_counter()
+    px2font(**options)
+    # ru_maxrss is given in kilobytes on linux
+    return perf_counter() - start, getrusage(RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(options):
+    """ Runs px2font in a fresh process and returns its duration and peak RSS """
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_px2font, options).result()
+
+
+def bench_memory(quantity=4000, grid=[5, 9], layers=8, chunk_sizes=(64, 512)):
+    results = {}
+    with TemporaryDirectory() as folder:
+        generate_layers(folder, quantity, grid, layers)
+        for chunk_size in (None, *chunk_sizes):
+            options = font_options(folder, path.join(folder, 'out.ufo'),
+                                   quantity, grid)
+            if chunk_size is not None:
+                options['output']['chunkSize'] = chunk_size
+            results[chunk_size] = measure(options)
+    return results
+
+
+if __name__ == '__main__':
+    for chunk_size, (duration, rss) in bench_memory().items():
+        print('{:>10}: {:.2f}s, peak RSS {:.1f} MB'.format(
+            'full' if chunk_size is None else 'chunk ' + str(chunk_size),
+            duration, rss))
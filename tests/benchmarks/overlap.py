@@ -0,0 +1,57 @@
+"""
+Compares the overlap removal of `union_contours` with a booleanOperations
+union of every glyph of a synthetic font, and the contour counts before and
+after.
+
+    python3 -m tests.benchmarks.overlap
+"""
+from itertools import product
+from time import perf_counter
+
+from booleanOperations import BooleanOperationManager
+from fontTools.pens.recordingPen import RecordingPointPen
+
+from px2ph.utils.overlap import recorded_contours, union_contours
+from tests.fixtures import (
+    linecaps, linejoins, stroke, synthetic_glyphs
+)
+
+
+def union_font(glyphs_contours, union):
+    """
+    Returns the duration of the union of every glyph and the resulting
+    number of contours.
+    """
+    count = 0
+    start = perf_counter()
+    for contours in glyphs_contours:
+        pen = RecordingPointPen()
+        union(contours, pen)
+        count += sum(method == 'beginPath' for method, _, _ in pen.value)
+    return perf_counter() - start, count
+
+
+def bench_overlap(glyphs=None):
+    glyphs = synthetic_glyphs(quantity=1000) if glyphs is None else glyphs
+    results = {}
+    for linejoin, linecap in product(linejoins, linecaps):
+        recordings, _ = stroke(glyphs, linejoin=linejoin, linecap=linecap)
+        glyphs_contours = [recorded_contours(recording)
+                           for recording in recordings]
+        results[(linejoin, linecap)] = {
+            'contours': sum(len(contours) for contours in glyphs_contours),
+            'generic': union_font(glyphs_contours,
+                                  BooleanOperationManager.union),
+            'grid': union_font(glyphs_contours, union_contours),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    for (linejoin, linecap), result in bench_overlap().items():
+        (generic, generic_count), (grid, count) = \
+            result['generic'], result['grid']
+        print('{:>5}/{:<6}: {} contours, booleanOperations {:.2f}s ({} '
+              'contours), union_contours {:.2f}s (x{:.1f}, {} contours)'
+              .format(linejoin, linecap, result['contours'], generic,
+                      generic_count, grid, generic / grid, count))
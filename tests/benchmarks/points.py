@@ -0,0 +1,45 @@
+"""
+Compares the write and read time and the file size of the points extracted by
+px2pt saved as yaml and as binary points (see `save_points`).
+
+    python3 -m tests.benchmarks.points
+"""
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.px2pt import extract_layers, load_points, merge_layers, save_points
+from px2ph.utils.yaml import get_yaml, save_as_yaml
+from tests.fixtures import generate_layers
+
+
+def timed(function, *args, **kwargs):
+    start = perf_counter()
+    result = function(*args, **kwargs)
+    return perf_counter() - start, result
+
+
+def bench_points(quantity=5000, grid=[5, 9], layers=4):
+    with TemporaryDirectory() as folder:
+        generate_layers(folder, quantity, grid, layers)
+        packed = list(extract_layers(folder, grid))
+        glyphs = merge_layers(packed)
+        yaml_path = path.join(folder, 'points.yml')
+        npz_path = path.join(folder, 'points.npz')
+
+        results = {}
+        write, _ = timed(save_as_yaml, yaml_path, glyphs)
+        read, _ = timed(get_yaml, yaml_path)
+        results['yaml'] = (write, read, path.getsize(yaml_path))
+
+        write, _ = timed(save_points, npz_path, packed, grid)
+        # reading includes unpacking the glyphs as lists like get_yaml does
+        read, _ = timed(lambda: merge_layers(load_points(npz_path, grid)[0]))
+        results['npz'] = (write, read, path.getsize(npz_path))
+    return results
+
+
+if __name__ == '__main__':
+    for name, (write, read, size) in bench_points().items():
+        print('{:>5}: write {:.3f}s, read {:.3f}s, {:.1f} kB'.format(
+            name, write, read, size / 1024))
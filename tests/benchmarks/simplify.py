@@ -0,0 +1,72 @@
+"""
+Compares point counts, .glif sizes and stroking time with and without the
+removal of straight points before stroking.
+
+    python3 -m tests.benchmarks.simplify
+"""
+from itertools import product
+
+from fontTools.pens.recordingPen import RecordingPointPen
+from fontTools.ufoLib.glifLib import writeGlyphToString
+
+from px2ph.utils.math import is_straight
+from tests.fixtures import (
+    linecaps, linejoins, stroke, synthetic_glyphs
+)
+
+
+def count_input_points(glyphs, simplify):
+    count = 0
+    for contours in glyphs:
+        for contour in contours:
+            if not simplify or len(contour) < 3:
+                count += len(contour)
+                continue
+            count += sum(
+                1 for i, (pt, segmentType) in enumerate(contour)
+                if segmentType == 'move' and i in (0, len(contour) - 1)
+                or not is_straight(contour[i-1][0], pt,
+                                   contour[(i+1) % len(contour)][0]))
+    return count
+
+
+def glif_size(recordings):
+    size = 0
+    for recording in recordings:
+        pen = RecordingPointPen()
+        pen.value = recording
+        size += len(writeGlyphToString('glyph', drawPointsFunc=pen.replay))
+    return size
+
+
+def count_output_points(recordings):
+    return sum(method == 'addPoint'
+               for recording in recordings for method, _, _ in recording)
+
+
+def bench_simplify(glyphs=None):
+    glyphs = synthetic_glyphs() if glyphs is None else glyphs
+    results = {'input points': (count_input_points(glyphs, False),
+                                count_input_points(glyphs, True))}
+    for linejoin, linecap in product(linejoins, linecaps):
+        result = []
+        for simplify in (False, True):
+            recordings, duration = stroke(glyphs, linejoin=linejoin,
+                                          linecap=linecap, simplify=simplify)
+            result.append((count_output_points(recordings),
+                           glif_size(recordings), duration))
+        results[(linejoin, linecap)] = result
+    return results
+
+
+if __name__ == '__main__':
+    results = bench_simplify()
+    before, after = results.pop('input points')
+    print('input points: {} -> {} ({:.1%})'.format(
+        before, after, after / before - 1))
+    for (linejoin, linecap), (before, after) in results.items():
+        print('{:>5}/{:<6}: points {} -> {} ({:.1%}), glif {:.0f}kB -> '
+              '{:.0f}kB, stroke {:.2f}s -> {:.2f}s'.format(
+                  linejoin, linecap, before[0], after[0],
+                  after[0] / before[0] - 1, before[1] / 1000,
+                  after[1] / 1000, before[2], after[2]))
@@ -0,0 +1,59 @@
+"""
+Measures the import time of the px2ph entry points with `python -X importtime`
+and compares it to the time they would take if the modules they only import
+when needed were imported eagerly.
+
+    python3 -m tests.benchmarks.startup
+"""
+import subprocess
+import sys
+
+entry_points = {
+    'px2ph.px2ph': ['defcon', 'px2ph.utils.binary', 'px2ph.utils.ufo',
+                    'glyphNameFormatter.reader',
+                    'concurrent.futures.process'],
+    'px2ph.px2pt': [],
+    'px2ph.tools.grid': ['px2ph.utils.png'],
+}
+
+
+def import_time(modules, repeat=5):
+    """
+    Returns the best total import time in seconds of the modules in a new
+    interpreter, and the names of all the imported modules.
+    """
+    timings = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c',
+             'import ' + ', '.join(modules)],
+            stderr=subprocess.PIPE, check=True, universal_newlines=True)
+        total, imported = 0, set()
+        for line in process.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            imported.add(name.strip())
+            # only top level imports, nested ones are in their cumulative time
+            if not name.startswith('  '):
+                total += int(cumulative)
+        timings.append(total / 1e6)
+    return min(timings), imported
+
+
+def bench_startup(entry_points=entry_points):
+    results = {}
+    for module, deferred in entry_points.items():
+        lazy, imported = import_time([module])
+        eager, _ = import_time([module] + deferred)
+        results[module] = (lazy, eager,
+                           sorted(name for name in deferred
+                                  if name not in imported))
+    return results
+
+
+if __name__ == '__main__':
+    for module, (lazy, eager, skipped) in bench_startup().items():
+        print('{:<17} {:.3f}s, eager imports {:.3f}s (x{:.2f}), not '
+              'imported: {}'.format(module, lazy, eager, eager / lazy,
+                                    ', '.join(skipped) or '-'))
@@ -0,0 +1,47 @@
+"""
+Compares StrokeToShapeSegmentPen with and without memoized joins and caps,
+and ArrayStrokeToShapeSegmentPen, on a dense synthetic glyph set.
+
+    python3 -m tests.benchmarks.stroke
+"""
+from itertools import product
+
+from px2ph.pens.arrayStrokePen import ArrayStrokeToShapeSegmentPen
+from px2ph.pens.strokePen import cached_outline
+from tests.fixtures import (
+    linecaps, linejoins, max_distance, stroke, synthetic_glyphs
+)
+
+
+def bench_stroke(glyphs=None):
+    glyphs = synthetic_glyphs() if glyphs is None else glyphs
+    results = {}
+    for linejoin, linecap in product(linejoins, linecaps):
+        reference, duration = stroke(glyphs, linejoin=linejoin,
+                                     linecap=linecap, memoize=False)
+        cached_outline.cache_clear()
+        memoized, memoized_duration = stroke(glyphs, linejoin=linejoin,
+                                             linecap=linecap)
+        info = cached_outline.cache_info()
+        array_stroked, array_duration = stroke(
+            glyphs, ArrayStrokeToShapeSegmentPen, linejoin=linejoin,
+            linecap=linecap)
+        results[(linejoin, linecap)] = {
+            'uncached': duration,
+            'memoized': memoized_duration,
+            'array': array_duration,
+            'hit_rate': info.hits / (info.hits + info.misses),
+            'max_distance': max(max_distance(reference, memoized),
+                                max_distance(reference, array_stroked)),
+        }
+    return results
+
+
+if __name__ == '__main__':
+    for (linejoin, linecap), result in bench_stroke().items():
+        print('{:>5}/{:<6}: {:.3f}s, memoized {:.3f}s (x{:.2f}, hit rate '
+              '{:.1%}), array {:.3f}s (x{:.2f}), max distance {:.2g}'.format(
+                  linejoin, linecap, result['uncached'], result['memoized'],
+                  result['uncached'] / result['memoized'], result['hit_rate'],
+                  result['array'], result['uncached'] / result['array'],
+                  result['max_distance']))
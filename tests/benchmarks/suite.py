@@ -0,0 +1,203 @@
+"""
+Runs every stage of a build on synthetic pixel fonts and saves their
+throughput, latency percentiles and peak memory as json, so that results of
+different commits can be compared.
+
+    python3 -m tests.benchmarks.suite -o results.json
+    python3 -m tests.benchmarks.suite -o new.json --compare results.json
+
+Every stage runs in a fresh process so that its peak RSS isn't shadowed by the
+previous ones. Latencies are measured per glyph for the stroke stages and per
+run for the others.
+"""
+import json
+import platform
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import product
+from multiprocessing import get_context
+from os import makedirs, path
+from resource import getrusage, RUSAGE_SELF
+from shutil import rmtree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from numpy import mean, percentile
+
+from tests.fixtures import font_options, generate_layers, linecaps, linejoins
+
+defaults = {'glyphs': 2000, 'grid': [5, 9], 'layers': 4, 'density': 0.3,
+            'repeat': 5}
+
+
+def run_px2pt(folder, config):
+    from px2ph.px2pt import px2pt
+
+    latencies = []
+    for _ in range(config['repeat']):
+        start = perf_counter()
+        px2pt(path.join(folder, 'layers'), config['grid'])
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+def run_stroke(folder, config, linejoin, linecap):
+    from fontTools.pens.recordingPen import RecordingPointPen
+
+    from px2ph.px2ph import font_setup
+    from px2ph.px2pt import px2pt
+
+    # glyphs are drawn by px2font's default 'pen' engine,
+    # StrokeToShapeSegmentPen
+    options = font_options(path.join(folder, 'layers'), '', config['glyphs'],
+                           config['grid'], linecap, linejoin)
+    _, _, draw, _ = font_setup(**options)
+    glyphs = px2pt(path.join(folder, 'layers'), config['grid'])
+    latencies = []
+    for contours in glyphs:
+        start = perf_counter()
+        draw(RecordingPointPen(), contours)
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+def run_parse_range(folder, config):
+    from px2ph.tools.glyphset import parse_range
+
+    glyph_range = font_options('', '', config['glyphs'],
+                               config['grid'])['output']['glyphSet']
+    latencies = []
+    for _ in range(config['repeat']):
+        start = perf_counter()
+        parse_range(glyph_range)
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+def run_px2font(folder, config):
+    from px2ph.px2ph import px2font
+
+    output = path.join(folder, 'out.ufo')
+    options = font_options(path.join(folder, 'layers'), output,
+                           config['glyphs'], config['grid'])
+    latencies = []
+    for _ in range(config['repeat']):
+        rmtree(output, ignore_errors=True)
+        start = perf_counter()
+        px2font(**options)
+        latencies.append(perf_counter() - start)
+    return latencies
+
+
+def run_stage(stage, *args):
+    latencies = stage(*args)
+    # ru_maxrss is given in kilobytes on linux
+    return latencies, getrusage(RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(stage, *args):
+    """ Runs a stage in a fresh process, returns its latencies and peak RSS """
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_stage, stage, *args).result()
+
+
+def summarize(latencies, glyphs, rss):
+    """
+    Returns the statistics of a stage that handled `glyphs` glyphs for every
+    latency sample.
+    """
+    return {
+        'samples': len(latencies),
+        'throughput': glyphs * len(latencies) / sum(latencies),
+        'mean': float(mean(latencies)),
+        'p50': float(percentile(latencies, 50)),
+        'p90': float(percentile(latencies, 90)),
+        'p99': float(percentile(latencies, 99)),
+        'peak_rss_mb': rss,
+    }
+
+
+def commit():
+    """ Returns the current git commit of the repository, if any """
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL, cwd=path.dirname(__file__), check=True,
+            universal_newlines=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(config=defaults):
+    stages = {}
+    with TemporaryDirectory() as folder:
+        makedirs(path.join(folder, 'layers'))
+        generate_layers(path.join(folder, 'layers'), config['glyphs'],
+                        config['grid'], config['layers'],
+                        density=config['density'])
+
+        for name, stage in (('px2pt', run_px2pt),
+                            ('parse_range', run_parse_range),
+                            ('px2font', run_px2font)):
+            latencies, rss = measure(stage, folder, config)
+            stages[name] = summarize(latencies, config['glyphs'], rss)
+        for linejoin, linecap in product(linejoins, linecaps):
+            latencies, rss = measure(run_stroke, folder, config, linejoin,
+                                     linecap)
+            stages['stroke {}/{}'.format(linejoin, linecap)] = \
+                summarize(latencies, 1, rss)
+
+    return {
+        'commit': commit(),
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'config': config,
+        'stages': stages,
+    }
+
+
+def compare(results, previous):
+    """
+    Yields every stage present in both results with its throughput and peak
+    RSS ratios to the previous ones.
+    """
+    for name, stage in results['stages'].items():
+        if name in previous['stages']:
+            other = previous['stages'][name]
+            yield (name, stage['throughput'] / other['throughput'],
+                   stage['peak_rss_mb'] / other['peak_rss_mb'])
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(prog='tests.benchmarks.suite',
+                            description='end-to-end px2ph benchmarks')
+    parser.add_argument('-o', '--output', default='benchmark-results.json',
+                        help='json file where to save the results')
+    parser.add_argument('--compare',
+                        help='json results of a previous run to compare to')
+    parser.add_argument('--glyphs', type=int, default=defaults['glyphs'])
+    parser.add_argument('--grid', type=int, nargs=2, default=defaults['grid'])
+    parser.add_argument('--layers', type=int, default=defaults['layers'])
+    parser.add_argument('--density', type=float, default=defaults['density'])
+    parser.add_argument('--repeat', type=int, default=defaults['repeat'],
+                        help='measured runs of the stages besides stroking')
+    args = parser.parse_args()
+
+    results = bench_suite({key: getattr(args, key) for key in defaults})
+    with open(args.output, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+
+    for name, stage in results['stages'].items():
+        print('{:<20} {:>10.0f} glyphs/s, p50 {:.2e}s, p99 {:.2e}s, peak RSS '
+              '{:.1f} MB'.format(name, stage['throughput'], stage['p50'],
+                                 stage['p99'], stage['peak_rss_mb']))
+    if args.compare is not None:
+        with open(args.compare) as previous_file:
+            previous = json.load(previous_file)
+        print('compared to {}:'.format(previous['commit'] or args.compare))
+        for name, throughput, rss in compare(results, previous):
+            print('{:<20} throughput x{:.2f}, peak RSS x{:.2f}'.format(
+                name, throughput, rss))
@@ -0,0 +1,65 @@
+"""
+Compares the 'trace' vectorize engine with stroking the contours, with and
+without overlap removal, for growing pixel densities, and reports the time
+per lit pixel, which should stay flat as the tracing scales linearly.
+
+    python3 -m tests.benchmarks.trace
+"""
+from functools import partial
+from time import perf_counter
+
+from fontTools.misc.transform import Transform
+from fontTools.pens.recordingPen import RecordingPointPen
+
+from px2ph.px2ph import draw_glyph
+from px2ph.px2pt import merge_layers, sheet_to_points
+from tests.fixtures import generate_sheet
+
+engines = {
+    'stroke': {'linecap': 'square', 'linejoin': 'miter'},
+    'stroke, removeOverlap': {'linecap': 'square', 'linejoin': 'miter',
+                              'removeOverlap': True},
+    'trace': {'engine': 'trace'},
+}
+
+
+def synthetic_contours(quantity, grid, layers, density):
+    return merge_layers([
+        sheet_to_points(generate_sheet(quantity, grid, density=density,
+                                       seed=seed), grid)
+        for seed in range(layers)])
+
+
+def draw_font(glyphs, draw, vectorize):
+    """ Returns the duration of drawing every glyph and its point count """
+    points = 0
+    start = perf_counter()
+    for contours in glyphs:
+        pen = RecordingPointPen()
+        draw(pen, contours, vectorize=vectorize)
+        points += sum(method == 'addPoint' for method, _, _ in pen.value)
+    return perf_counter() - start, points
+
+
+def bench_trace(quantity=500, grid=[16, 16], layers=3,
+                densities=(0.1, 0.3, 0.6, 1)):
+    transform = Transform(100, 0, 0, 100, 0, 0).transform(
+        (1, 0, 0, -1, 0.5, grid[1] - 2.5))
+    draw = partial(draw_glyph, transform=transform, stroke_width=100)
+    results = {}
+    for density in densities:
+        glyphs = synthetic_contours(quantity, grid, layers, density)
+        pixels = sum(len(contour) for contours in glyphs if contours
+                     for contour in contours)
+        results[density] = pixels, {
+            name: draw_font(glyphs, draw, vectorize)
+            for name, vectorize in engines.items()}
+    return results
+
+
+if __name__ == '__main__':
+    for density, (pixels, result) in bench_trace().items():
+        print('density {} ({} lit pixels):'.format(density, pixels))
+        for name, (duration, points) in result.items():
+            print('{:>23}: {:.3f}s ({:.1f}us per pixel), {} points'.format(
+                name, duration, duration / pixels * 1e6, points))
@@ -0,0 +1,72 @@
+"""
+Compares the time to write stroked glyphs to a UFO with defcon and with
+px2ph.utils.ufo.UFOStreamWriter, and checks both outputs are identical.
+
+    python3 -m tests.benchmarks.ufo_writer
+"""
+from os import path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from defcon import Font
+from fontTools.pens.recordingPen import RecordingPointPen
+
+from px2ph.utils.ufo import UFOStreamWriter
+from tests.fixtures import read_tree, stroke, synthetic_glyphs
+
+info = {'familyName': 'Synth', 'styleName': 'Regular', 'unitsPerEm': 1000}
+
+
+def replayer(recording):
+    pen = RecordingPointPen()
+    pen.value = recording
+    return pen.replay
+
+
+def save_defcon(font_path, recordings):
+    font = Font()
+    font.info.setDataFromSerialization(info)
+    for n, recording in enumerate(recordings):
+        glyph = font.newGlyph('uni{:04X}'.format(0x4E00 + n))
+        glyph.unicodes = [0x4E00 + n]
+        replayer(recording)(glyph.getPointPen())
+    font.save(path=font_path)
+
+
+def save_stream(font_path, recordings, jobs=None):
+    font = Font()
+    font.info.setDataFromSerialization(info)
+    writer = UFOStreamWriter(font_path, font.info, jobs)
+    for n, recording in enumerate(recordings):
+        writer.write_glyph('uni{:04X}'.format(0x4E00 + n), [0x4E00 + n],
+                           replayer(recording))
+    writer.close()
+
+
+def bench_ufo_writer(quantities=(1000, 5000, 20000), jobs=4):
+    results = {}
+    for quantity in quantities:
+        recordings, _ = stroke(synthetic_glyphs(quantity), simplify=True)
+        with TemporaryDirectory() as folder:
+            paths = [path.join(folder, name + '.ufo')
+                     for name in ('defcon', 'stream', 'jobs')]
+            timings = []
+            for save, font_path in zip(
+                    (save_defcon, save_stream,
+                     lambda *args: save_stream(*args, jobs=jobs)), paths):
+                start = perf_counter()
+                save(font_path, recordings)
+                timings.append(perf_counter() - start)
+            reference = read_tree(paths[0])
+            identical = all(read_tree(font_path) == reference
+                            for font_path in paths[1:])
+        results[quantity] = (*timings, identical)
+    return results
+
+
+if __name__ == '__main__':
+    for quantity, (defcon, stream, jobs, identical) in \
+            bench_ufo_writer().items():
+        print('{:>6} glyphs: defcon {:.2f}s, stream {:.2f}s, stream with 4 '
+              'jobs {:.2f}s, identical: {}'.format(
+                  quantity, defcon, stream, jobs, identical))
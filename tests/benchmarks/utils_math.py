@@ -0,0 +1,43 @@
+"""
+Micro-benchmarks of the px2ph.utils.math functions used by the stroke pens.
+
+    python3 -m tests.benchmarks.utils_math
+"""
+from timeit import Timer
+
+import px2ph.utils.math as math_
+
+
+segment = ((150.0, 650.0), (150.0, 550.0))
+other = ((150.0, 550.0), (250.0, 550.0))
+parallel, other_parallel = (math_.double_parallel(segment, 50)[0],
+                            math_.double_parallel(other, 50)[0])
+
+cases = {
+    'vector': lambda: math_.vector(*segment),
+    'uvector': lambda: math_.uvector(*segment),
+    'scale': lambda: math_.scale(segment[0], 50),
+    'move': lambda: math_.move(*segment),
+    'rotate 90': lambda: math_.rotate(segment[0], 90),
+    'rotate -90': lambda: math_.rotate(segment[0], -90),
+    'rotate 180': lambda: math_.rotate(segment[0], 180.0),
+    'rotate 45': lambda: math_.rotate(segment[0], 45),
+    'double_parallel': lambda: math_.double_parallel(segment, 50),
+    'intersect': lambda: math_.intersect(parallel, other_parallel),
+    'intersect force': lambda: math_.intersect(parallel, other_parallel, True),
+}
+
+
+def bench_math(number=100000, repeat=5):
+    """
+    Returns the best time per call in nanoseconds of every case.
+    """
+    return {
+        name: min(Timer(function).repeat(repeat, number)) / number * 1e9
+        for name, function in cases.items()
+    }
+
+
+if __name__ == '__main__':
+    for name, duration in bench_math().items():
+        print('{:>16}: {:7.1f} ns'.format(name, duration))
@@ -0,0 +1,69 @@
+"""
+Compares building the masters of a variable font, extracted once and
+stroked at every master stroke width, with running px2font once per master,
+for UFO masters (saved by defcon or ufoLib) and a variable TrueType font, and
+the time spent in every stage of both builds.
+
+    python3 -m tests.benchmarks.variable
+"""
+from os import makedirs, path
+from shutil import rmtree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.px2ph import px2font
+from px2ph.utils import instrument
+from tests.fixtures import font_options, generate_layers
+
+masters = [
+    {'name': 'Light', 'strokeWidth': 60, 'location': 300},
+    {'name': 'Regular', 'strokeWidth': 100, 'location': 400},
+    {'name': 'Bold', 'strokeWidth': 130, 'location': 700},
+    {'name': 'Black', 'strokeWidth': 160, 'location': 900},
+]
+
+
+def build(options):
+    """ Returns the duration of a build and its seconds per span """
+    output_folder = path.dirname(options['output']['folder'])
+    rmtree(output_folder, ignore_errors=True)
+    makedirs(output_folder)
+    instrument.enable()
+    start = perf_counter()
+    px2font(**options)
+    duration = perf_counter() - start
+    instrument.disable()
+    return duration, {name: span['seconds']
+                      for name, span in instrument.report()['spans'].items()}
+
+
+def bench_variable(quantity=2000, grid=[5, 9], layers=4):
+    results = {}
+    with TemporaryDirectory() as folder:
+        layers_folder = path.join(folder, 'layers')
+        makedirs(layers_folder)
+        generate_layers(layers_folder, quantity, grid, layers)
+        for format, writer in (('ufo', None), ('ufo', 'ufoLib'),
+                               ('ttf', None)):
+            options = font_options(layers_folder,
+                                   path.join(folder, 'out', 'Synth.ufo'),
+                                   quantity, grid)
+            options['output'].update(format=format, writer=writer)
+            # every run of a same build takes about the same time
+            duration, spans = build(options)
+            separate = (len(masters) * duration,
+                        {name: len(masters) * seconds
+                         for name, seconds in spans.items()})
+            options['output']['masters'] = masters
+            results[writer or format] = separate, build(options)
+    return results
+
+
+if __name__ == '__main__':
+    for name, ((separate, spans), (variable, variable_spans)) in \
+            bench_variable().items():
+        print('{}: {} px2font runs {:.2f}s, masters {:.2f}s (x{:.1f})'.format(
+            name, len(masters), separate, variable, separate / variable))
+        for span in sorted(spans.keys() | variable_spans.keys()):
+            print('{:>13}: {:.2f}s -> {:.2f}s'.format(
+                span, spans.get(span, 0), variable_spans.get(span, 0)))
@@ -0,0 +1,62 @@
+"""
+Measures the watch mode turnaround after a one pixel edit and checks the
+rebuilt font is identical to a build from scratch.
+
+    python3 -m tests.benchmarks.watch
+"""
+from os import makedirs, path
+from shutil import rmtree
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from numpy import array
+from PIL import Image
+
+from px2ph.px2ph import px2font
+from px2ph.utils.yaml import save_as_yaml
+from px2ph.watch import FontWatcher
+from tests.fixtures import font_options, generate_layers, read_tree
+
+
+def bench_watch(quantity=2000, grid=[5, 9], layers=4, edits=5):
+    with TemporaryDirectory() as folder:
+        layers_folder = path.join(folder, 'layers')
+        output = path.join(folder, 'out.ufo')
+        config_file = path.join(folder, 'font.yml')
+        makedirs(layers_folder)
+        layers_paths = generate_layers(layers_folder, quantity, grid, layers)
+        options = font_options(layers_folder, output, quantity, grid)
+        save_as_yaml(config_file, options)
+
+        start = perf_counter()
+        watcher = FontWatcher(config_file)
+        initial = perf_counter() - start
+
+        timings = []
+        for n in range(edits):
+            # toggles one pixel of a glyph in the first layer
+            with Image.open(layers_paths[0]) as img:
+                nparray = array(img)
+            x = (grid[0] + 1) * (quantity * n // edits) + 1
+            nparray[1, x, 1] = 255 - nparray[1, x, 1]
+            Image.fromarray(nparray, 'LA').save(layers_paths[0], format='png')
+
+            start = perf_counter()
+            rebuilt = watcher.poll()
+            timings.append(perf_counter() - start)
+            assert rebuilt == 1, 'one glyph should be rebuilt'
+
+        watched = read_tree(output)
+        rmtree(output)
+        rmtree(path.join(folder, '.px2ph-cache'))
+        px2font(**options, cache=True)
+        identical = read_tree(output) == watched
+    return initial, timings, identical
+
+
+if __name__ == '__main__':
+    initial, timings, identical = bench_watch()
+    print('initial build {:.2f}s, one glyph edit {:.0f}ms (best {:.0f}ms), '
+          'identical to a build from scratch: {}'.format(
+              initial, sum(timings) / len(timings) * 1000,
+              min(timings) * 1000, identical))
@@ -0,0 +1,34 @@
+"""
+Compares px2pt extraction time for several worker counts.
+
+    python3 -m tests.benchmarks.workers
+"""
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from px2ph.px2pt import px2pt
+from tests.fixtures import generate_layers
+
+
+def bench_workers(quantity=4000, grid=[5, 9], layers=16,
+                  workers=(1, 2, 4, 8), repeat=3):
+    with TemporaryDirectory() as folder:
+        generate_layers(folder, quantity, grid, layers)
+        reference = px2pt(folder, grid)
+        results = {}
+        for count in workers:
+            timings = []
+            for _ in range(repeat):
+                start = perf_counter()
+                glyphs = px2pt(folder, grid, workers=count)
+                timings.append(perf_counter() - start)
+            assert glyphs == reference, 'output differs from the serial run'
+            results[count] = min(timings)
+    return results
+
+
+if __name__ == '__main__':
+    results = bench_workers()
+    for count, timing in results.items():
+        print('{} worker(s): {:.3f}s (x{:.2f})'.format(
+            count, timing, results[1] / timing))
@@ -0,0 +1,171 @@
+from os import path, walk
+from time import perf_counter
+
+from fontTools.misc.transform import Transform
+from fontTools.pens.recordingPen import RecordingPointPen
+from numpy import uint8, zeros
+from numpy.random import default_rng
+from PIL import Image
+
+from px2ph.pens.strokePen import StrokeToShapeSegmentPen
+from px2ph.px2pt import layer_to_points
+
+# Synthetic pixel layers, fonts options and stroked glyphs shared by the unit
+# tests and the benchmarks.
+
+linecaps = ('butt', 'square', 'round', 'sharp')
+linejoins = ('bevel', 'miter', 'round')
+
+
+def random_stroke(rng, grid, length):
+    """
+    Returns the pixels of a self-avoiding walk inside the grid that tends to
+    keep its direction, like strokes drawn in a pixel font.
+    """
+    directions = [(1, 0), (0, 1), (-1, 0), (0, -1)]
+    x, y = int(rng.integers(grid[0])), int(rng.integers(grid[1]))
+    direction = directions[int(rng.integers(4))]
+    pixels = [(x, y)]
+    while len(pixels) < length:
+        if rng.random() > 0.7:
+            direction = directions[int(rng.integers(4))]
+        candidates = [direction] + [d for d in directions if d != direction]
+        for dx, dy in candidates:
+            nx, ny = x + dx, y + dy
+            if (0 <= nx < grid[0] and 0 <= ny < grid[1]
+                    and (nx, ny) not in pixels):
+                break
+        else:
+            break
+        x, y, direction = nx, ny, (dx, dy)
+        pixels.append((x, y))
+    return pixels
+
+
+def generate_sheet(quantity, grid, margin=[1, 1], density=0.3, seed=0,
+                   columns=None):
+    """
+    Returns a random 'LA' numpy array laid out like a px2pt layer: a row of
+    `quantity` glyph cells separated by `margin` pixels, or rows of `columns`
+    cells if given, each holding one stroke covering about `density` of the
+    cell.
+    Half of the strokes are open (they start with a black pixel).
+    """
+    rng = default_rng(seed)
+    columns = columns or quantity
+    rows = -(-quantity // columns)
+    width, height = grid[0] + margin[0], grid[1] + margin[1]
+    nparray = zeros((height * rows + margin[1], width * columns + margin[0], 2),
+                    uint8)
+    length = max(1, int(grid[0] * grid[1] * density))
+    for index in range(quantity):
+        y = height * (index // columns) + margin[1]
+        x = width * (index % columns) + margin[0]
+        cell = nparray[y:y + grid[1], x:x + grid[0]]
+        start = 0 if rng.random() < 0.5 else 1
+        for intensity, (x, y) in enumerate(random_stroke(rng, grid, length),
+                                           start):
+            cell[y, x] = (min(intensity, 255), 255)
+    return nparray
+
+
+def generate_layers(folder, quantity, grid, layers=1, margin=[1, 1],
+                    density=0.3, seed=0, columns=None):
+    """
+    Saves `layers` random sheets as png files in the folder and returns their
+    paths.
+    """
+    paths = []
+    for n in range(layers):
+        nparray = generate_sheet(quantity, grid, margin, density, seed + n,
+                                 columns)
+        paths.append(path.join(folder, 'layer{:03d}.png'.format(n)))
+        Image.fromarray(nparray, 'LA').save(paths[-1], format='png')
+    return paths
+
+
+def font_options(layers_folder, output_folder, quantity, grid,
+                 linecap='square', linejoin='miter'):
+    """
+    Returns px2font options for `quantity` synthetic glyphs mapped on
+    consecutive CJK ideographs.
+    """
+    first = 0x4E00
+    return {
+        'input': {'folder': layers_folder, 'grid': grid},
+        'info': {
+            'familyName': 'Synth',
+            'styleName': 'Regular',
+            'pixelSizeInEm': 100,
+            'ascender': grid[1] - 2,
+            'capHeight': grid[1] - 2,
+            'xHeight': grid[1] - 4,
+            'descender': -2,
+        },
+        'output': {
+            'folder': output_folder,
+            'glyphSet': chr(first) + '-' + chr(first + quantity - 1),
+            'vectorize': {'linecap': linecap, 'linejoin': linejoin},
+        },
+    }
+
+
+def read_tree(folder):
+    """
+    Returns the content of every file of a folder by relative path.
+    """
+    files = {}
+    for root, _, names in walk(folder):
+        for name in names:
+            with open(path.join(root, name), 'rb') as tree_file:
+                files[path.relpath(path.join(root, name), folder)] = \
+                    tree_file.read()
+    return files
+
+
+def synthetic_glyphs(quantity=2000, grid=[5, 9], layers=4, density=0.5):
+    """
+    Returns glyphs contours transformed as in px2font.
+    """
+    transform = Transform(100, 0, 0, 100, 0, 0).transform(
+        (1, 0, 0, -1, 0.5, grid[1] - 2.5))
+    glyphs = [[] for n in range(quantity)]
+    for seed in range(layers):
+        nparray = generate_sheet(quantity, grid, density=density, seed=seed)
+        for glyph, part in zip(glyphs, layer_to_points(nparray, grid)):
+            if part is not None:
+                glyph.append([(transform.transformPoint(pt), segmentType)
+                              for pt, segmentType in part])
+    return glyphs
+
+
+def stroke(glyphs, pen_class=StrokeToShapeSegmentPen, **options):
+    """
+    Strokes every glyph and returns the recorded outlines and the duration.
+    """
+    recordings = []
+    start = perf_counter()
+    for contours in glyphs:
+        out_pen = RecordingPointPen()
+        pen = pen_class(out_pen, 100, **options)
+        for contour in contours:
+            pen.beginPath()
+            for pt, segmentType in contour:
+                pen.addPoint(pt, segmentType)
+            pen.endPath()
+        recordings.append(out_pen.value)
+    return recordings, perf_counter() - start
+
+
+def max_distance(recordings, others):
+    """
+    Returns the largest distance between two matching recorded points.
+    """
+    distance = 0
+    for recording, other in zip(recordings, others):
+        assert len(recording) == len(other)
+        for (method, args, kwargs), (_, other_args, _) in zip(recording, other):
+            if method == 'addPoint':
+                (x0, y0), (x1, y1) = args[0], other_args[0]
+                distance = max(distance, abs(x0 - x1), abs(y0 - y1))
+    return distance
@@ -0,0 +1,86 @@
+import unittest
+from io import BytesIO
+
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+from px2ph.px2ph import parse_font_info
+from px2ph.utils.binary import BinaryFontBuilder
+
+info = {
+    'familyName': 'Test',
+    'styleName': 'Regular',
+    'unitsPerEm': 1000,
+    'ascender': 700,
+    'descender': -200,
+    'xHeight': 400,
+    'capHeight': 600,
+}
+
+
+def draw_square(pen, x, size=100):
+    """ Draws a counter-clockwise square, as UFO outer contours """
+    pen.moveTo((x, 0))
+    pen.lineTo((x + size, 0))
+    pen.lineTo((x + size, size))
+    pen.lineTo((x, size))
+    pen.closePath()
+
+
+def draw_drop(pen, x):
+    """ Draws a counter-clockwise contour made of a line and a curve """
+    pen.moveTo((x, 0))
+    pen.lineTo((x + 100, 0))
+    pen.curveTo((x + 100, 80), (x + 20, 120), (x, 100))
+    pen.closePath()
+
+
+class BinaryFontBuilderTest(unittest.TestCase):
+    def build(self, format):
+        builder = BinaryFontBuilder(info, format)
+        pen = builder.glyph_pen()
+        draw_square(pen, 0)
+        builder.add_glyph('a', [ord('a')], pen)
+        pen = builder.glyph_pen()
+        draw_square(pen, 0)
+        draw_drop(pen, 200)
+        builder.add_glyph('b', [ord('b')], pen)
+        data = BytesIO()
+        builder.save(data)
+        data.seek(0)
+        return TTFont(data)
+
+    def test_glyphs(self):
+        # TrueType outer contours run clockwise, CFF ones counter-clockwise
+        for format, sign in (('ttf', -1), ('otf', 1)):
+            with self.subTest(format=format):
+                font = self.build(format)
+                self.assertEqual(font.getGlyphOrder(), ['.notdef', 'a', 'b'])
+                self.assertEqual(font.getBestCmap(),
+                                 {ord('a'): 'a', ord('b'): 'b'})
+                glyph_set = font.getGlyphSet()
+                for name, contours in (('a', 1), ('b', 2)):
+                    pen = RecordingPen()
+                    glyph_set[name].draw(pen)
+                    operators = [operator for operator, _ in pen.value]
+                    self.assertEqual(operators.count('closePath'), contours)
+                    if format == 'ttf':
+                        self.assertNotIn('curveTo', operators)
+                    area = AreaPen(glyph_set)
+                    glyph_set[name].draw(area)
+                    self.assertGreater(sign * area.value, 0)
+
+    def test_non_integer_pixel_size(self):
+        float_info = parse_font_info({
+            'familyName': 'Test', 'pixelSizeInEm': 62.5, 'ascender': 7,
+            'descender': -2, 'xHeight': 5, 'capHeight': 6})
+        for format in ('ttf', 'otf'):
+            with self.subTest(format=format):
+                font = BinaryFontBuilder(float_info, format).build()
+                self.assertEqual(font['hhea'].ascent, 438)
+                self.assertEqual(font['hhea'].descent, -125)
+                self.assertEqual(font['OS/2'].sxHeight, 313)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
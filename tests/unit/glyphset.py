@@ -0,0 +1,45 @@
+import unittest
+from os import listdir
+from tempfile import TemporaryDirectory
+
+from px2ph.tools import glyphset
+from px2ph.tools.glyphset import (
+    GlyphNameIndex, parse_range, range_to_glyphset, str_to_glyphset
+)
+
+selectors = ['Basic Latin', 'a-z', 'A9\\-', ['0-9', 'Basic Latin', '!']]
+ranges = [(0x20, 0x7E), (0x41, 0x41), (0x70, 0x90)]
+
+
+def glyph_sets():
+    """ Returns the glyph sets of the selectors and ranges """
+    return ([parse_range(selector) for selector in selectors]
+            + [str_to_glyphset(selector) for selector in selectors
+               if isinstance(selector, str)]
+            + [range_to_glyphset(range_) for range_ in ranges])
+
+
+class GlyphNameIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        self.shared_index = glyphset._index
+
+    def tearDown(self):
+        glyphset._index = self.shared_index
+        self.folder.cleanup()
+
+    def test_warm_index_same_as_cold(self):
+        glyphset._index = GlyphNameIndex(self.folder.name)
+        cold = glyph_sets()
+        self.assertIn('ranges.json', listdir(self.folder.name))
+        # a new index reads the files written by the first one
+        glyphset._index = GlyphNameIndex(self.folder.name)
+        warm = glyph_sets()
+        self.assertEqual(cold, warm)
+        self.assertEqual([list(glyph_set) for glyph_set in cold],
+                         [list(glyph_set) for glyph_set in warm])
+        self.assertTrue(all(cold[:3]))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,51 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from numpy import array
+from PIL import Image
+
+from px2ph.tools.grid import generate_file, generate_numpy_img
+
+options = {
+    'grid': [3, 4],
+    'quantity': 5,
+    'color': [10, 20, 30],
+    'bg_color': [200, 100, 50],
+    'columns': 2,
+}
+
+
+class GridTest(unittest.TestCase):
+    def test_cells_and_background(self):
+        grid, columns = options['grid'], options['columns']
+        nparray = generate_numpy_img(**options)
+        # 3 rows of 2 cells, each preceded by a margin, and the last margins
+        self.assertEqual(nparray.shape, (3 * (grid[1] + 1) + 1,
+                                         2 * (grid[0] + 1) + 1, 3))
+
+        checked = (nparray == options['bg_color'][::-1]).all(axis=2)
+        for index in range(3 * columns):
+            row, column = divmod(index, columns)
+            top, left = row * (grid[1] + 1) + 1, column * (grid[0] + 1) + 1
+            with self.subTest(index=index):
+                cell = nparray[top:top + grid[1], left:left + grid[0]]
+                if index < options['quantity']:
+                    self.assertTrue((cell == options['color'][::-1]).all())
+                else:
+                    self.assertTrue((cell == options['bg_color'][::-1]).all())
+                checked[top:top + grid[1], left:left + grid[0]] = True
+        # everything else is background
+        self.assertTrue(checked.all())
+
+    def test_file_same_as_array(self):
+        with TemporaryDirectory() as folder:
+            filepath = path.join(folder, 'grid.png')
+            generate_file(filepath, options)
+            with Image.open(filepath) as img:
+                self.assertTrue(
+                    (array(img) == generate_numpy_img(**options)).all())
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
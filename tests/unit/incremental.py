@@ -0,0 +1,106 @@
+import unittest
+from os import listdir, makedirs, path, stat, utime
+from tempfile import TemporaryDirectory
+
+from fontTools.ufoLib.glifLib import GlyphSet
+from numpy import array
+from PIL import Image
+
+from px2ph.px2ph import px2font
+from tests.fixtures import font_options, generate_layers
+
+
+def glyphs_files(font_path):
+    """ Returns the content of every file of the UFO glyphs folder """
+    glyphs_folder = path.join(font_path, 'glyphs')
+    contents = {}
+    for filename in listdir(glyphs_folder):
+        with open(path.join(glyphs_folder, filename), 'rb') as glyph_file:
+            contents[filename] = glyph_file.read()
+    return contents
+
+
+def build(options, cache):
+    # px2font consumes some of its options
+    px2font(**{key: dict(value) for key, value in options.items()},
+            cache=cache)
+
+
+class UpdateFontTest(unittest.TestCase):
+    quantity, grid, columns = 20, [5, 9], 5
+
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        self.layers_folder = path.join(self.folder.name, 'layers')
+        makedirs(self.layers_folder)
+        self.layers_paths = generate_layers(self.layers_folder, self.quantity,
+                                            self.grid, 2,
+                                            columns=self.columns)
+        self.font_path = path.join(self.folder.name, 'out.ufo')
+        self.options = font_options(self.layers_folder, self.font_path,
+                                    self.quantity, self.grid)
+        build(self.options, True)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def assertSameAsFullBuild(self):
+        full_path = path.join(self.folder.name, 'full.ufo')
+        options = font_options(self.layers_folder, full_path, self.quantity,
+                               self.grid)
+        options['output']['glyphSet'] = self.options['output']['glyphSet']
+        build(options, False)
+        self.assertEqual(glyphs_files(self.font_path),
+                         glyphs_files(full_path))
+
+    def test_only_edited_glyph_rebuilt(self):
+        glyphs_folder = path.join(self.font_path, 'glyphs')
+        for filename in listdir(glyphs_folder):
+            utime(path.join(glyphs_folder, filename), ns=(0, 0))
+
+        # toggles one pixel of the fourth glyph in the first layer
+        with Image.open(self.layers_paths[0]) as img:
+            nparray = array(img)
+        x = (self.grid[0] + 1) * 3 + 1
+        nparray[1, x, 1] = 255 - nparray[1, x, 1]
+        Image.fromarray(nparray, 'LA').save(self.layers_paths[0],
+                                            format='png')
+        build(self.options, True)
+
+        contents = GlyphSet(glyphs_folder).contents
+        rewritten = [name for name, filename in contents.items()
+                     if stat(path.join(glyphs_folder, filename)).st_mtime_ns]
+        self.assertEqual(rewritten, ['uni4E03'])
+        self.assertSameAsFullBuild()
+
+    def test_stale_glyphs_deleted(self):
+        # the last row of cells is only partly used
+        quantity = self.quantity - self.columns + 1
+        self.options['output']['glyphSet'] = '{}-{}'.format(
+            chr(0x4E00), chr(0x4E00 + quantity - 1))
+        build(self.options, True)
+        glyphs_folder = path.join(self.font_path, 'glyphs')
+        self.assertEqual(
+            sorted(GlyphSet(glyphs_folder).keys()),
+            ['uni{:04X}'.format(0x4E00 + n) for n in range(quantity)])
+        self.assertEqual(len(listdir(glyphs_folder)), quantity + 1)
+        self.assertSameAsFullBuild()
+
+    def test_bands_same_as_whole_layers(self):
+        # rows of glyphs are decoded one at a time
+        for chunk_size, cache in ((None, True), (3, True), (3, False)):
+            with self.subTest(chunk_size=chunk_size, cache=cache):
+                bands_path = path.join(self.folder.name, 'bands.ufo')
+                options = font_options(self.layers_folder, bands_path,
+                                       self.quantity, self.grid)
+                options['input']['bands'] = True
+                options['output']['chunkSize'] = chunk_size
+                options['output']['cache'] = {
+                    'folder': path.join(self.folder.name, 'bands-cache')}
+                build(options, cache)
+                self.assertEqual(glyphs_files(self.font_path),
+                                 glyphs_files(bands_path))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,51 @@
+import unittest
+
+from px2ph.utils import instrument
+
+
+class InstrumentTest(unittest.TestCase):
+    def tearDown(self):
+        instrument.disable()
+
+    def test_disabled(self):
+        instrument.enable()
+        instrument.disable()
+        with instrument.span('stroke'):
+            instrument.count('glyphs')
+        self.assertEqual(instrument.report(), {'spans': {}, 'counters': {}})
+
+    def test_totals(self):
+        instrument.enable()
+        for _ in range(3):
+            with instrument.span('stroke'):
+                instrument.count('glyphs')
+        instrument.count('points', 10)
+        instrument.disable()
+        # collected values are kept once disabled
+        with instrument.span('stroke'):
+            instrument.count('glyphs')
+
+        report = instrument.report()
+        self.assertEqual(report['spans']['stroke']['calls'], 3)
+        self.assertEqual(report['counters'], {'glyphs': 3, 'points': 10})
+
+        # a report of another process adds up
+        seconds = report['spans']['stroke']['seconds']
+        instrument.merge({
+            'spans': {'stroke': {'calls': 2, 'seconds': 1.0},
+                      'save': {'calls': 1, 'seconds': 0.5}},
+            'counters': {'glyphs': 2},
+        })
+        self.assertEqual(instrument.report(), {
+            'spans': {'save': {'calls': 1, 'seconds': 0.5},
+                      'stroke': {'calls': 5, 'seconds': seconds + 1.0}},
+            'counters': {'glyphs': 5, 'points': 10},
+        })
+
+        # enabling again starts from scratch
+        instrument.enable()
+        self.assertEqual(instrument.report(), {'spans': {}, 'counters': {}})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
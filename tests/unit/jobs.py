@@ -0,0 +1,35 @@
+import unittest
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+
+from px2ph.px2ph import px2font
+from tests.fixtures import font_options, generate_layers, read_tree
+
+
+class JobsTest(unittest.TestCase):
+    def test_same_as_serial(self):
+        quantity, grid = 30, [5, 9]
+        with TemporaryDirectory() as folder:
+            layers_folder = path.join(folder, 'layers')
+            makedirs(layers_folder)
+            generate_layers(layers_folder, quantity, grid, 2)
+            for cache in (False, True):
+                with self.subTest(cache=cache):
+                    trees = []
+                    for jobs in (None, 2):
+                        name = '{}-{}'.format(cache, jobs)
+                        options = font_options(
+                            layers_folder, path.join(folder, name + '.ufo'),
+                            quantity, grid)
+                        # small chunks so that several are stroked at once
+                        options['output'].update(
+                            chunkSize=4,
+                            cache={'folder': path.join(folder, name)})
+                        px2font(**options, cache=cache, jobs=jobs)
+                        trees.append(read_tree(options['output']['folder']))
+                    self.assertEqual(len(trees[0]), quantity + 5)
+                    self.assertEqual(trees[0], trees[1])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
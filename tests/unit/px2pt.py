@@ -0,0 +1,150 @@
+import unittest
+from os import path
+from tempfile import TemporaryDirectory
+
+from numpy import array_equal, concatenate, memmap, uint8, zeros
+from numpy.random import default_rng
+from PIL import Image
+
+from px2ph.px2pt import (
+    extract_layers, get_image_as_nparray, iter_glyphs, iter_points_chunks,
+    layer_to_points, load_points, merge_layers, nparray_to_points,
+    nparray_to_points_loop, px2pt, read_layers, save_points
+)
+from tests.fixtures import generate_layers, generate_sheet
+
+
+class NparrayToPointsTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = [5, 9]
+        self.rng = default_rng(0)
+
+    def random_glyph(self, density):
+        nparray = zeros((self.grid[1], self.grid[0], 2), uint8)
+        lit = self.rng.random(nparray.shape[:2]) < density
+        # few distinct intensities so that the sort has to be stable
+        nparray[:, :, 0] = self.rng.choice([0, 50, 100, 200], size=lit.shape)
+        nparray[:, :, 1] = lit * 255
+        return nparray
+
+    def test_same_points_as_loop(self):
+        for density in (0.1, 0.5, 1):
+            for _ in range(20):
+                nparray = self.random_glyph(density)
+                self.assertEqual(
+                    nparray_to_points_loop(nparray, self.grid),
+                    nparray_to_points(nparray, self.grid))
+
+    def test_empty_glyph(self):
+        nparray = self.random_glyph(0)
+        self.assertIsNone(nparray_to_points(nparray, self.grid))
+
+
+class LayerToPointsTest(unittest.TestCase):
+    def setUp(self):
+        self.grid = [5, 9]
+        self.rng = default_rng(1)
+
+    def random_sheet(self, quantity, margin):
+        shape = (self.grid[1] + 2 * margin[1],
+                 (self.grid[0] + margin[0]) * quantity + margin[0])
+        nparray = zeros((*shape, 2), uint8)
+        nparray[:, :, 0] = self.rng.choice([0, 50, 100, 200], size=shape)
+        nparray[:, :, 1] = (self.rng.random(shape) < 0.3) * 255
+        # leave some glyphs empty
+        nparray[:, :self.grid[0] + margin[0] + 1, 1] = 0
+        return nparray
+
+    def test_batch_same_points_as_loop(self):
+        for margin in ([1, 1], [2, 3]):
+            nparray = self.random_sheet(12, margin)
+            batch = layer_to_points(nparray, self.grid, margin, 'batch')
+            self.assertEqual(len(batch), 12)
+            self.assertIsNone(batch[0])
+            self.assertEqual(
+                layer_to_points(nparray, self.grid, margin, 'loop'), batch)
+
+
+class IterGlyphsTest(unittest.TestCase):
+    def test_same_glyphs_as_px2pt(self):
+        grid = [5, 9]
+        with TemporaryDirectory() as folder:
+            generate_layers(folder, 50, grid, layers=3)
+            glyphs = px2pt(folder, grid)
+            layers = read_layers(folder)
+            for chunk_size in (1, 7, 64):
+                self.assertEqual(
+                    glyphs, list(iter_glyphs(layers, grid, chunk_size=chunk_size)))
+
+
+
+class GridLayoutTest(unittest.TestCase):
+    def test_rows_same_glyphs_as_one_row(self):
+        grid, margin = [5, 9], [1, 1]
+        width, height = grid[0] + margin[0], grid[1] + margin[1]
+        row = generate_sheet(60, grid, margin)
+        # same glyphs laid out in 4 rows of 15
+        rows = concatenate([
+            row[:height, n * 15 * width:(n + 1) * 15 * width + margin[0]]
+            for n in range(4)
+        ] + [row[-margin[1]:, :15 * width + margin[0]]])
+
+        glyphs = layer_to_points(row, grid, margin)
+        with TemporaryDirectory() as folder:
+            Image.fromarray(rows, 'LA').save(path.join(folder, 'layer.png'))
+            for engine in ('batch', 'loop'):
+                self.assertEqual(layer_to_points(rows, grid, margin, engine),
+                                 glyphs)
+            for bands in (False, True):
+                self.assertEqual(px2pt(folder, grid, bands=bands),
+                                 [[glyph] if glyph else None
+                                  for glyph in glyphs])
+            self.assertEqual(
+                list(iter_glyphs([rows], grid, margin, chunk_size=7)),
+                list(iter_glyphs([row], grid, margin, chunk_size=7)))
+
+
+class LayerCacheTest(unittest.TestCase):
+    def test_cached_layers(self):
+        grid = [5, 9]
+        with TemporaryDirectory() as folder:
+            cache = path.join(folder, 'cache')
+            layer_path = generate_layers(folder, 20, grid)[0]
+            decoded = get_image_as_nparray(layer_path)
+            self.assertTrue(array_equal(
+                get_image_as_nparray(layer_path, cache), decoded))
+            cached = get_image_as_nparray(layer_path, cache)
+            self.assertIsInstance(cached, memmap)
+            self.assertTrue(array_equal(cached, decoded))
+            self.assertEqual(px2pt(folder, grid, cache=cache),
+                             px2pt(folder, grid))
+
+            edited = decoded.copy()
+            edited[1, 1] = 255 - edited[1, 1]
+            Image.fromarray(edited, 'LA').save(layer_path, format='png')
+            self.assertTrue(array_equal(
+                get_image_as_nparray(layer_path, cache), edited))
+
+
+class PointsFileTest(unittest.TestCase):
+    def test_saved_points_same_glyphs(self):
+        grid = [5, 9]
+        with TemporaryDirectory() as folder:
+            generate_layers(folder, 40, grid, 3, columns=15)
+            points_path = path.join(folder, 'points.npz')
+            save_points(points_path, list(extract_layers(folder, grid)), grid,
+                        shape=(3, 15))
+
+            glyphs = px2pt(folder, grid)
+            layers, shape = load_points(points_path, grid)
+            self.assertEqual(shape, (3, 15))
+            self.assertEqual(merge_layers(layers), glyphs)
+            self.assertEqual(
+                [glyph for chunk in iter_points_chunks(layers, 7)
+                 for glyph in merge_layers(chunk)], glyphs)
+            with self.assertRaises(ValueError):
+                load_points(points_path, [6, 9])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
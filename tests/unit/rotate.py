@@ -0,0 +1,24 @@
+import unittest
+
+from px2ph.utils.math import rotate
+
+
+class RotateTest(unittest.TestCase):
+    def test_right_angles_exact(self):
+        v = (3, 5)
+        for theta, expected in ((90, (-5, 3)), (180, (-3, -5)),
+                                (270, (5, -3)), (-90, (5, -3)),
+                                (450, (-5, 3)), (90.0, (-5, 3))):
+            with self.subTest(theta=theta):
+                rotated = rotate(v, theta)
+                self.assertEqual(rotated, expected)
+                self.assertTrue(all(type(value) is int for value in rotated))
+
+    def test_other_angles(self):
+        x, y = rotate((2, 0), 60)
+        self.assertAlmostEqual(x, 1)
+        self.assertAlmostEqual(y, 3 ** 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,152 @@
+import unittest
+from functools import partial
+from itertools import product
+
+from fontTools.misc.transform import Transform
+from fontTools.pens.areaPen import AreaPen
+from fontTools.pens.pointPen import PointToSegmentPen
+from fontTools.pens.recordingPen import RecordingPointPen
+
+from px2ph.pens import StrokeToShapeSegmentPen, ArrayStrokeToShapeSegmentPen
+from px2ph.px2ph import draw_glyph
+from px2ph.px2pt import layer_to_points
+from px2ph.utils.overlap import recorded_contours, union_contours
+from tests.fixtures import (
+    generate_sheet, linecaps, linejoins, max_distance, stroke,
+    synthetic_glyphs
+)
+
+
+class ArrayStrokePenTest(unittest.TestCase):
+    def setUp(self):
+        self.glyphs = synthetic_glyphs(quantity=100)
+
+    def test_same_outlines_as_pen(self):
+        for linejoin, linecap in product(linejoins, linecaps):
+            with self.subTest(linejoin=linejoin, linecap=linecap):
+                options = {'linejoin': linejoin, 'linecap': linecap,
+                           'memoize': False}
+                reference, _ = stroke(self.glyphs, StrokeToShapeSegmentPen,
+                                      **options)
+                recordings, _ = stroke(self.glyphs,
+                                       ArrayStrokeToShapeSegmentPen, **options)
+                self.assertEqual(
+                    [[(method, args[1:]) for method, args, _ in recording]
+                     for recording in reference],
+                    [[(method, args[1:]) for method, args, _ in recording]
+                     for recording in recordings])
+                self.assertLess(max_distance(reference, recordings), 1e-9)
+
+
+class ResetTest(unittest.TestCase):
+    def test_reused_pen_draws_as_new_pens(self):
+        glyphs = synthetic_glyphs(quantity=50)
+        for pen_class, linejoin in product(
+                (StrokeToShapeSegmentPen, ArrayStrokeToShapeSegmentPen),
+                linejoins):
+            with self.subTest(pen_class=pen_class, linejoin=linejoin):
+                reference, _ = stroke(glyphs, pen_class, linejoin=linejoin,
+                                      linecap='round')
+                pen = pen_class(None, 100, linejoin=linejoin, linecap='round')
+                recordings = []
+                for contours in glyphs:
+                    out_pen = RecordingPointPen()
+                    pen.reset(out_pen)
+                    for contour in contours:
+                        pen.beginPath()
+                        for pt, segmentType in contour:
+                            pen.addPoint(pt, segmentType)
+                        pen.endPath()
+                    recordings.append(out_pen.value)
+                self.assertEqual(reference, recordings)
+
+
+class SimplifyTest(unittest.TestCase):
+    def test_straight_points_removed(self):
+        # an L shaped stroke: a vertical stem then a horizontal bar
+        contour = [((0, 0), 'move')] + [((0, y), 'line') for y in range(1, 5)] \
+            + [((x, 4), 'line') for x in range(1, 4)]
+        for linejoin, linecap in product(linejoins, linecaps):
+            with self.subTest(linejoin=linejoin, linecap=linecap):
+                recordings = [
+                    stroke([[contour]], linejoin=linejoin, linecap=linecap,
+                           simplify=simplify)[0][0]
+                    for simplify in (False, True)
+                ]
+                points = [[args[0] for method, args, _ in recording
+                           if method == 'addPoint']
+                          for recording in recordings]
+                self.assertLess(len(points[1]), len(points[0]))
+                self.assertTrue(set(points[1]) <= set(points[0]))
+
+
+def area(recording):
+    pen = AreaPen()
+    for contour in recorded_contours(recording):
+        contour.drawPoints(PointToSegmentPen(pen))
+    return pen.value
+
+
+class UnionContoursTest(unittest.TestCase):
+    def test_same_area_as_boolean_union(self):
+        from booleanOperations import BooleanOperationManager
+
+        glyphs = synthetic_glyphs(quantity=50)
+        for linejoin, linecap in (('miter', 'square'), ('bevel', 'butt'),
+                                  ('round', 'round')):
+            with self.subTest(linejoin=linejoin, linecap=linecap):
+                recordings, _ = stroke(glyphs, linejoin=linejoin,
+                                       linecap=linecap)
+                for recording in recordings:
+                    contours = recorded_contours(recording)
+                    union, reference = RecordingPointPen(), RecordingPointPen()
+                    union_contours(contours, union)
+                    BooleanOperationManager.union(contours, reference)
+                    self.assertAlmostEqual(area(union.value),
+                                           area(reference.value), delta=1)
+
+                    difference = RecordingPointPen()
+                    BooleanOperationManager.xor(
+                        recorded_contours(union.value),
+                        recorded_contours(reference.value), difference)
+                    self.assertLess(abs(area(difference.value)), 1)
+
+
+class TraceGlyphTest(unittest.TestCase):
+    def test_same_outline_as_pixel_squares(self):
+        from booleanOperations import BooleanOperationManager
+
+        grid = [5, 9]
+        transform = Transform(100, 0, 0, 100, 0, 0).transform(
+            (1, 0, 0, -1, 0.5, grid[1] - 2.5))
+        draw = partial(draw_glyph, transform=transform, stroke_width=100)
+        nparray = generate_sheet(50, grid, density=0.6)
+        for contours in layer_to_points(nparray, grid):
+            if contours is None:
+                continue
+            traced = RecordingPointPen()
+            draw(traced, [contours], vectorize={'engine': 'trace'})
+            # only corners are kept
+            for contour in recorded_contours(traced.value):
+                for i, (pt, _) in enumerate(contour):
+                    x0, y0 = contour[i - 1][0]
+                    x1, y1 = contour[(i + 1) % len(contour)][0]
+                    self.assertFalse(x0 == pt[0] == x1 or y0 == pt[1] == y1)
+
+            # every pixel stroked as a one point contour, then merged
+            squares = RecordingPointPen()
+            draw(squares, [[point] for point in contours],
+                 vectorize={'linecap': 'square'})
+            reference = RecordingPointPen()
+            BooleanOperationManager.union(recorded_contours(squares.value),
+                                          reference)
+            self.assertEqual(area(traced.value), area(reference.value))
+            difference = RecordingPointPen()
+            BooleanOperationManager.xor(recorded_contours(traced.value),
+                                        recorded_contours(reference.value),
+                                        difference)
+            self.assertEqual(area(difference.value), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,32 @@
+import unittest
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+
+from px2ph.px2ph import px2font
+from tests.fixtures import font_options, generate_layers, read_tree
+
+
+class UFOStreamWriterTest(unittest.TestCase):
+    def test_same_as_defcon(self):
+        quantity, grid = 30, [5, 9]
+        with TemporaryDirectory() as folder:
+            layers_folder = path.join(folder, 'layers')
+            makedirs(layers_folder)
+            generate_layers(layers_folder, quantity, grid, 2)
+            trees = []
+            for writer, writer_jobs in ((None, None), ('ufoLib', None),
+                                        ('ufoLib', 2)):
+                font_path = path.join(folder, 'out.ufo')
+                options = font_options(layers_folder, font_path, quantity,
+                                       grid)
+                options['output'].update(writer=writer,
+                                         writerJobs=writer_jobs)
+                px2font(**options)
+                trees.append(read_tree(font_path))
+            self.assertEqual(len(trees[0]), quantity + 5)
+            self.assertEqual(trees[0], trees[1])
+            self.assertEqual(trees[0], trees[2])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
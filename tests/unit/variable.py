@@ -0,0 +1,85 @@
+import unittest
+from os import makedirs, path
+from tempfile import TemporaryDirectory
+
+from fontTools.pens.recordingPen import RecordingPen
+from fontTools.ttLib import TTFont
+
+from px2ph.pens import StrokeToShapeSegmentPen
+from px2ph.px2ph import px2font
+from px2ph.variable import check_compatibility, compatible_quadratic
+from px2ph.utils.binary import as_segment_pen
+from tests.fixtures import font_options, generate_layers, synthetic_glyphs
+
+masters = [
+    {'name': 'Light', 'strokeWidth': 60, 'location': 300},
+    {'name': 'Regular', 'strokeWidth': 100, 'location': 400},
+    {'name': 'Black', 'strokeWidth': 160, 'location': 900},
+]
+
+
+def stroke_master(glyphs, stroke_width, linecap='round'):
+    """ Records the segments of the glyphs as in `master_outlines` """
+    recordings = []
+    for contours in glyphs:
+        out_pen = RecordingPen()
+        pen = StrokeToShapeSegmentPen(out_pen, stroke_width, as_segment_pen,
+                                      linecap=linecap,
+                                      outputImpliedClosingLine=True)
+        for contour in contours:
+            pen.beginPath()
+            for pt, segmentType in contour:
+                pen.addPoint(pt, segmentType)
+            pen.endPath()
+        recordings.append(out_pen.value)
+    return recordings
+
+
+class CompatibleMastersTest(unittest.TestCase):
+    def test_round_caps_compatible_quadratic(self):
+        glyphs = synthetic_glyphs(quantity=50)
+        outlines = [stroke_master(glyphs, master['strokeWidth'])
+                    for master in masters]
+        for glyph_outlines in zip(*outlines):
+            check_compatibility('glyph', glyph_outlines)
+            quadratic = compatible_quadratic(glyph_outlines, 1.0)
+            self.assertEqual(
+                len({tuple((operator, len(operands))
+                           for operator, operands in outline)
+                     for outline in quadratic}), 1)
+
+    def test_incompatible_outlines(self):
+        square, circle = [
+            stroke_master([[[((0, 0), 'line')]]], 100, linecap)[0]
+            for linecap in ('square', 'round')]
+        with self.assertRaises(ValueError):
+            check_compatibility('glyph', [square, circle])
+
+
+class VariableFontTest(unittest.TestCase):
+    def test_variable_ttf(self):
+        quantity, grid = 20, [5, 9]
+        with TemporaryDirectory() as folder:
+            layers_folder = path.join(folder, 'layers')
+            makedirs(layers_folder)
+            generate_layers(layers_folder, quantity, grid, 2)
+            options = font_options(layers_folder, path.join(folder, 'out.ufo'),
+                                   quantity, grid)
+            options['output'].update(format='ttf', masters=masters,
+                                     axis={'default': 400})
+            px2font(**options)
+
+            font = TTFont(path.join(folder, 'out.ttf'))
+            axis, = font['fvar'].axes
+            self.assertEqual((axis.axisTag, axis.minValue, axis.defaultValue,
+                              axis.maxValue), ('wght', 300, 400, 900))
+            self.assertEqual(len(font['fvar'].instances), len(masters))
+            self.assertEqual(len(font.getGlyphOrder()), quantity + 1)
+
+    def test_rejected_linejoin(self):
+        # rejected before the missing layers are read
+        options = font_options('missing', 'out.ufo', 20, [5, 9],
+                               linejoin='round')
+        options['output']['masters'] = masters
+        with self.assertRaisesRegex(ValueError, 'round'):
+            px2font(**options)
@@ -0,0 +1,74 @@
+import unittest
+from os import listdir, makedirs, path, stat, utime
+from tempfile import TemporaryDirectory
+
+from fontTools.ufoLib.glifLib import GlyphSet
+from numpy import array
+from PIL import Image
+
+from px2ph.utils.yaml import save_as_yaml
+from px2ph.watch import FontWatcher
+from tests.fixtures import font_options, generate_layers
+
+
+class FontWatcherTest(unittest.TestCase):
+    # the last row of glyphs has 2 unused cells
+    quantity, grid, columns = 22, [5, 9], 8
+
+    def setUp(self):
+        self.folder = TemporaryDirectory()
+        layers_folder = path.join(self.folder.name, 'layers')
+        makedirs(layers_folder)
+        self.layers_paths = generate_layers(layers_folder, self.quantity,
+                                            self.grid, 2,
+                                            columns=self.columns)
+        self.glyphs_folder = path.join(self.folder.name, 'out.ufo', 'glyphs')
+        config_file = path.join(self.folder.name, 'font.yml')
+        save_as_yaml(config_file, font_options(
+            layers_folder, path.join(self.folder.name, 'out.ufo'),
+            self.quantity, self.grid))
+        self.watcher = FontWatcher(config_file)
+        for filename in listdir(self.glyphs_folder):
+            utime(path.join(self.glyphs_folder, filename), ns=(0, 0))
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def toggle_pixels(self, indices):
+        """ Toggles one pixel of the cells at the indices in the first layer """
+        layer_path = self.layers_paths[0]
+        mtime = stat(layer_path).st_mtime_ns
+        with Image.open(layer_path) as img:
+            nparray = array(img)
+        for index in indices:
+            row, column = divmod(index, self.columns)
+            y = row * (self.grid[1] + 1) + 1
+            x = column * (self.grid[0] + 1) + 1
+            nparray[y, x, 1] = 255 - nparray[y, x, 1]
+        Image.fromarray(nparray, 'LA').save(layer_path, format='png')
+        # makes sure the watcher sees the modification
+        utime(layer_path, ns=(mtime + 10**9, mtime + 10**9))
+
+    def rewritten(self):
+        contents = GlyphSet(self.glyphs_folder).contents
+        return [name for name, filename in contents.items()
+                if stat(path.join(self.glyphs_folder, filename)).st_mtime_ns]
+
+    def test_only_edited_glyph_redrawn(self):
+        self.toggle_pixels([3])
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertEqual(self.rewritten(), ['uni4E03'])
+        self.assertIsNone(self.watcher.poll())
+
+    def test_unused_cell_ignored(self):
+        self.toggle_pixels([self.quantity + 1])
+        self.assertEqual(self.watcher.poll(), 0)
+        self.assertEqual(self.rewritten(), [])
+
+        self.toggle_pixels([self.quantity, 5])
+        self.assertEqual(self.watcher.poll(), 1)
+        self.assertEqual(self.rewritten(), ['uni4E05'])
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)